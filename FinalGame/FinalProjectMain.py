@@ -2,78 +2,64 @@ import tkinter as tk
 from tkinter import ttk
 from PIL import Image, ImageTk
 import os
-import random
-
-# ------------------------
-# Factor Graph Framework
-# ------------------------
-
-# Variable node (stores data like HP, location, inventory)
-class Variable:
-    def __init__(self, name, value=None):
-        self.name = name      # variable name
-        self.value = value    # current value
-        self.factors = []     # connected factors (rules)
-
-    def connect(self, factor):
-        self.factors.append(factor)  # connect to a factor
-
-
-# Factor node (rule that updates variables)
-class Factor:
-    def __init__(self, name, func, variables):
-        self.name = name
-        self.func = func              # function logic
-        self.variables = variables    # variables it controls
-        for v in variables:
-            v.connect(self)           # connect factor to variables
-
-    def update(self, action=None):
-        self.func(self.variables, action)  # run update rule
+import sys
 
+# Allow running as a script from the repo root: python FinalGame/FinalProjectMain.py
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from engine.asset_cache import load_resized, prefetch_resized
+from engine.widget_pool import ButtonPool
+from FinalGame.combat_odds import hint
+from FinalGame.factor_core import FactorGame
 
 # ------------------------
 # Utility
 # ------------------------
+try:
+    RESAMPLE = Image.Resampling.LANCZOS
+except AttributeError:
+    RESAMPLE = Image.BICUBIC
+
+
 # Load an image or create gray placeholder
 def load_image(name, size=(1000, 700)):
     img_path = os.path.join("assets", name + ".png")
-    try:
-        resample = Image.Resampling.LANCZOS
-    except AttributeError:
-        resample = Image.BICUBIC
     if os.path.exists(img_path):
-        img = Image.open(img_path).resize(size, resample)
+        img = load_resized(img_path, size, "RGBA", RESAMPLE)
     else:
         img = Image.new("RGB", size, color="gray")
     return img
 
 
+# Decode + resize an image on a background thread so load_image is instant
+def prefetch_image(name, size=(1000, 700)):
+    prefetch_resized(os.path.join("assets", name + ".png"), size, "RGBA", RESAMPLE)
+
+
 # ------------------------
 # Adventure Game (GUI + Factor Graph)
 # ------------------------
-class AdventureGame(tk.Tk):
-    def __init__(self):
-        super().__init__()
+class AdventureGame(FactorGame, tk.Tk):
+    def __init__(self, seed=None):
+        tk.Tk.__init__(self)
         self.title("Adventure Quest (Factor Graph)")  # window title
         self.geometry("1000x700")                     # fixed window size
         self.resizable(False, False)
 
-        # Variables (nodes in factor graph)
-        self.PlayerHP = Variable("PlayerHP", 100)
-        self.EnemyHP = Variable("EnemyHP", 0)
-        self.PlayerLocation = Variable("Location", "forest")
-        self.Inventory = Variable("Inventory", [])
+        # Variables, factors and the seeded RNG (see factor_core.py)
+        FactorGame.__init__(self, seed)
 
-        # Factors (rules connected to variables)
-        self.factors = []
-        self.factors.append(Factor("Movement", self.movement_factor, [self.PlayerLocation]))
-        self.factors.append(Factor("Combat", self.combat_factor, [self.PlayerHP, self.EnemyHP]))
-        self.factors.append(Factor("Treasure", self.treasure_factor, [self.PlayerLocation, self.Inventory]))
-
-        # Load background images for each scene
+        # Background images for each scene, loaded on first use
         self.locations = ["forest", "cave", "river", "treasure", "safe", "lost"]
-        self.images = {name: ImageTk.PhotoImage(load_image(name)) for name in self.locations}
+        self.images = {}
+        # Scenes each scene can lead to, used to prefetch their images
+        self.next_scenes = {
+            "forest": ["cave", "river"],
+            "cave": ["safe", "lost", "forest"],
+            "river": ["treasure", "forest"],
+            "treasure": ["forest"],
+            "safe": ["treasure"],
+            "lost": ["cave"],
+        }
 
         # Background image display
         self.bg_label = tk.Label(self)
@@ -87,6 +73,8 @@ class AdventureGame(tk.Tk):
         # Button area (for actions)
         self.button_frame = tk.Frame(self, bg="gray")
         self.button_frame.place(relx=0.5, rely=0.75, anchor="center")
+        self.choice_buttons = ButtonPool(self.button_frame, pack={"side": "left", "padx": 10},
+                                         font=("Arial", 12), width=18, height=2, bg="navy", fg="white")
 
         # Health bars
         self.player_bar = ttk.Progressbar(self, length=200, maximum=100)
@@ -95,6 +83,9 @@ class AdventureGame(tk.Tk):
         tk.Label(self, text="Enemy HP").place(x=750, y=650)
         self.player_bar.place(x=120, y=650)
         self.enemy_bar.place(x=820, y=650)
+        # Exact fight odds per policy, between the bars (see combat_odds.py)
+        self.odds_label = tk.Label(self, text="", wraplength=420, justify="center", font=("Arial", 9))
+        self.odds_label.place(relx=0.5, y=650, anchor="n")
 
         # Log box (shows battle messages)
         self.log_box = tk.Text(self, height=6, width=110, state="disabled",
@@ -106,51 +97,11 @@ class AdventureGame(tk.Tk):
                           [("Go to Cave", lambda: self.take_action("GoCave")),
                            ("Go to River", lambda: self.take_action("GoRiver"))])
 
-    # ------------------------
-    # Factor Functions (rules)
-    # ------------------------
-
-    # Movement rule
-    def movement_factor(self, vars, action):
-        loc = vars[0]
-        if action == "GoCave":
-            loc.value = "cave"
-        elif action == "GoRiver":
-            loc.value = "river"
-        elif action == "GoTreasure":
-            loc.value = "treasure"
-        elif action == "ReturnForest":
-            loc.value = "forest"
-
-    # Combat rule
-    def combat_factor(self, vars, action):
-        player, enemy = vars
-        if action == "Fight":   # start fight
-            enemy.value = 50
-            self.log("⚔️ A wild enemy appears!")
-        elif action == "Attack" and enemy.value > 0:   # attack enemy
-            dmg = random.randint(10, 25)
-            enemy.value = max(0, enemy.value - dmg)
-            self.log(f"You strike for {dmg}! Enemy HP = {enemy.value}")
-        elif action == "Defend" and enemy.value > 0:   # defend move
-            dmg = max(0, random.randint(5, 15) - random.randint(0, 5))
-            player.value = max(0, player.value - dmg)
-            self.log(f"You defend! Enemy deals {dmg}. Player HP = {player.value}")
-
-    # Treasure rule
-    def treasure_factor(self, vars, action):
-        loc, inv = vars
-        if loc.value == "treasure":
-            inv.value = ["💰 Gold", "💎 Diamonds", "👑 Crown", "🗿 Ancient Relic"]
-            self.log("🎉 You found the treasure!")
-
     # ------------------------
     # Game Flow
     # ------------------------
     def take_action(self, action):
-        # Apply all factors to action
-        for f in self.factors:
-            f.update(action)
+        FactorGame.take_action(self, action)
         # Update GUI
         self.refresh_gui(action)
 
@@ -161,6 +112,7 @@ class AdventureGame(tk.Tk):
         # Update HP bars
         self.player_bar["value"] = max(0, hp)
         self.enemy_bar["value"] = max(0, ehp)
+        self.odds_label.config(text=hint(hp, ehp) if loc == "cave" else "")
 
         # Scene control
         if loc == "forest":
@@ -185,9 +137,8 @@ class AdventureGame(tk.Tk):
                               [("Play Again", lambda: self.take_action("ReturnForest")),
                                ("View Inventory", self.show_inventory)])
 
-        # Player defeated
+        # Player defeated (the rules already swapped the inventory)
         if hp <= 0:
-            self.Inventory.value = ["⚔️ Broken Sword", "🪨 Rocks", "🛡️ Torn Shield"]
             self.update_scene("lost", "You were defeated...",
                               [("Retry", lambda: self.take_action("GoCave")),
                                ("View Inventory", self.show_inventory)])
@@ -198,16 +149,18 @@ class AdventureGame(tk.Tk):
 
     # Update screen with background, story, and buttons
     def update_scene(self, bg_name, text, options):
-        self.bg_label.configure(image=self.images[bg_name])
+        self.bg_label.configure(image=self.scene_image(bg_name))
+        for name in self.next_scenes.get(bg_name, []):
+            prefetch_image(name)
         self.story_text.config(text=text)
-        # Clear old buttons
-        for w in self.button_frame.winfo_children():
-            w.destroy()
-        # Add new buttons
-        for label, action in options:
-            tk.Button(self.button_frame, text=label, command=action,
-                      font=("Arial", 12), width=18, height=2,
-                      bg="navy", fg="white").pack(side="left", padx=10)
+        # Relabel the pooled buttons (extra ones are hidden, not destroyed)
+        self.choice_buttons.show(options)
+
+    # PhotoImage for a scene; the PIL image is usually already prefetched
+    def scene_image(self, name):
+        if name not in self.images:
+            self.images[name] = ImageTk.PhotoImage(load_image(name))
+        return self.images[name]
 
     # Add a line to the log window
     def log(self, msg):
@@ -232,5 +185,7 @@ class AdventureGame(tk.Tk):
 
 # Run the game
 if __name__ == "__main__":
-    AdventureGame().mainloop()
+    game = AdventureGame()
+    game.mainloop()
+    game.save_record()   # logs/factor_sessions.jsonl, for python -m engine.replay
 
@@ -0,0 +1,152 @@
+# FinalGame/combat_odds.py
+#
+# Exact odds for the cave fight, shown as a hint beside the health bars.
+#
+# A policy is "attack with probability p, otherwise defend" (p=1 always
+# attacks, p=0 always defends). Each turn either the enemy loses an attack
+# roll or the player loses an enemy roll, so the fight is a walk over
+# (player HP, enemy HP) that only ever moves down. The DP splits it:
+#   - K = strikes needed to kill the enemy, from convolution powers of the
+#     attack damage PMF truncated below enemy HP;
+#   - G = damage the player takes between two strikes, a geometric sum of
+#     enemy-damage PMF powers truncated below player HP (zero-damage turns
+#     only stretch the fight, so they are folded out);
+#   - damage before the kill is G convolved K times, mixed over P(K = k).
+# Only damage below the player's HP matters (more is a loss), so every
+# array has player_hp + 1 entries and no sampling is needed. Results are
+# memoised per (player HP, enemy HP, p).
+#
+# The mixing loop does one truncated product per possible strike (enemy HP
+# / minimum attack damage), so the cost grows with enemy HP: under a
+# millisecond for the game's fight (100 vs ENEMY_HP), about 20 ms at
+# 1000 vs 1000. It is meant for the game's HP range, not arbitrary HP.
+
+from functools import lru_cache
+
+import numpy as np
+
+from FinalGame.factor_core import ATTACK_DAMAGE, BLOCK, ENEMY_DAMAGE
+
+POLICIES = {"Attack": 1.0, "Defend": 0.0, "50/50": 0.5}
+FFT_ABOVE = 512         # truncated products switch to FFT above this length
+
+
+def _uniform(lo, hi):
+    pmf = np.zeros(hi + 1)
+    pmf[lo:] = 1.0 / (hi - lo + 1)
+    return pmf
+
+
+def damage_pmfs():
+    # (attack damage PMF, damage-taken PMF), index = damage
+    hit = np.convolve(_uniform(*ENEMY_DAMAGE), _uniform(*BLOCK)[::-1])   # index = hit - block + BLOCK[1]
+    taken = hit[BLOCK[1]:].copy()
+    taken[0] += hit[:BLOCK[1]].sum()        # max(0, ...)
+    return _uniform(*ATTACK_DAMAGE), taken
+
+
+ATTACK_PMF, TAKEN_PMF = damage_pmfs()
+
+
+def _mul(a, b, n):
+    # First n coefficients of the product of two series
+    if n <= FFT_ABOVE:
+        return np.convolve(a[:n], b[:n])[:n]
+    size = 1 << (2 * n - 1).bit_length()
+    return np.fft.irfft(np.fft.rfft(a[:n], size) * np.fft.rfft(b[:n], size), size)[:n]
+
+
+def _inverse(f, n):
+    # First n coefficients of 1 / f (f[0] == 1), by Newton iteration
+    x = np.ones(1)
+    m = 1
+    while m < n:
+        m = min(2 * m, n)
+        x = _mul(x, 2 * np.eye(1, m)[0] - _mul(f, x, m), m)
+    return x
+
+
+class Odds:
+    def __init__(self, player_hp, enemy_hp, attack_prob, hp):
+        self.player_hp = player_hp
+        self.enemy_hp = enemy_hp
+        self.attack_prob = attack_prob
+        self.hp = hp                        # hp[x] = P(fight ends with x HP); hp[0] = defeat
+        self.win = float(hp[1:].sum())
+
+    @property
+    def lose(self):
+        return float(self.hp[0])
+
+    @property
+    def expected_hp(self):
+        # Mean HP left, given a win
+        if self.win <= 0:
+            return 0.0
+        return float(np.arange(1, len(self.hp)) @ self.hp[1:]) / self.win
+
+    def hp_quantile(self, q):
+        # Smallest HP x with P(HP <= x | win) >= q
+        if self.win <= 0:
+            return 0
+        cdf = np.cumsum(self.hp[1:]) / self.win
+        return int(np.searchsorted(cdf, q - 1e-12)) + 1
+
+
+@lru_cache(maxsize=4096)
+def combat_odds(player_hp, enemy_hp, attack_prob=1.0):
+    # Exact outcome of the fight from (player_hp, enemy_hp) under a policy
+    h, e, p = max(0, int(player_hp)), max(0, int(enemy_hp)), float(attack_prob)
+    hp = np.zeros(h + 1)
+    if h == 0 or e == 0:
+        hp[h] = 1.0
+        return _frozen(Odds(h, e, p, hp))
+
+    # A turn that deals no damage changes nothing; drop those turns
+    q0 = TAKEN_PMF[0]
+    defend = (1.0 - p) * (1.0 - q0)
+    strike = p / (p + defend) if p > 0 else 0.0
+    taken = np.zeros(h)
+    k = min(h, len(TAKEN_PMF))
+    taken[1:k] = TAKEN_PMF[1:k] / (1.0 - q0)
+
+    # G(s) = P(s damage taken, then a strike) = strike / (1 - (1-strike) * taken(z))
+    g = strike * _inverse(-(1.0 - strike) * taken + np.eye(1, h)[0], h)
+
+    # Mix G^k over the number of strikes k the enemy takes; every strike
+    # deals at least ATTACK_DAMAGE[0], so there are at most this many
+    alive = np.zeros(e)
+    alive[0] = 1.0                          # enemy damage dealt so far, below e
+    before = np.zeros(h)
+    before[0] = 1.0                         # player damage taken by the k-th strike
+    damage = np.zeros(h)
+    for _ in range(-(-e // ATTACK_DAMAGE[0])):
+        survived = alive.sum()
+        alive = _mul(alive, ATTACK_PMF, e)
+        before = _mul(before, g, h)
+        damage += (survived - alive.sum()) * before
+
+    hp[1:] = damage[::-1].clip(0.0)     # FFT round-off
+    hp[0] = max(0.0, 1.0 - hp[1:].sum())
+    return _frozen(Odds(h, e, p, hp))
+
+
+def _frozen(odds):
+    odds.hp.flags.writeable = False         # shared by the memo cache
+    return odds
+
+
+def hint(player_hp, enemy_hp):
+    # One line for the GUI: each policy's win chance and HP left
+    if player_hp <= 0 or enemy_hp <= 0:
+        return ""
+    parts = []
+    for name, p in POLICIES.items():
+        odds = combat_odds(player_hp, enemy_hp, p)
+        text = f"{name}: win {odds.win:.0%}"
+        if odds.win > 0:
+            low = odds.hp_quantile(0.1)
+            mean = odds.expected_hp
+            text += f", HP {mean:.0f}" if low >= round(mean) else f", HP ~{mean:.0f} (90% >= {low})"
+        parts.append(text)
+    return "  |  ".join(parts)
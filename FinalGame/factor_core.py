@@ -0,0 +1,213 @@
+# FinalGame/factor_core.py
+#
+# The factor-graph game without any Tk: variables, rules and a scheduler.
+# AdventureGame (FinalProjectMain.py) draws it; engine/replay.py re-runs
+# recorded sessions through it headless. All randomness comes from the
+# game's own seeded RNG, so a seed plus the list of actions reproduces a
+# session exactly.
+
+import json
+import os
+import random
+
+# Combat numbers (FinalGame/combat_odds.py computes exact odds from these)
+ENEMY_HP = 50
+ATTACK_DAMAGE = (10, 25)    # randint range of a strike
+ENEMY_DAMAGE = (5, 15)      # randint range of the enemy's hit when defending...
+BLOCK = (0, 5)              # ...minus randint of what the shield blocks
+
+# ------------------------
+# Factor Graph Framework
+# ------------------------
+
+# Variable node (stores data like HP, location, inventory)
+class Variable:
+    def __init__(self, name, value=None):
+        self.name = name      # variable name
+        self._value = value   # current value
+        self.factors = []     # connected factors (rules)
+        self.scheduler = None # notified when the value changes
+
+    @property
+    def value(self):
+        return self._value
+
+    @value.setter
+    def value(self, new):
+        if new != self._value:
+            self._value = new
+            if self.scheduler is not None:
+                self.scheduler.mark_dirty(self)
+
+    def connect(self, factor):
+        self.factors.append(factor)  # connect to a factor
+
+
+# Factor node (rule that updates variables)
+# `actions`: actions this rule reacts to
+# `watches`: variables whose changes re-fire this rule
+# A rule with neither runs on every action (old behaviour).
+class Factor:
+    def __init__(self, name, func, variables, actions=None, watches=None):
+        self.name = name
+        self.func = func              # function logic
+        self.variables = variables    # variables it controls
+        self.actions = set(actions or [])
+        self.watches = list(watches or [])
+        for v in variables:
+            v.connect(self)           # connect factor to variables
+
+    def update(self, action=None):
+        self.func(self.variables, action)  # run update rule
+
+
+# Scheduler: runs only the rules an action or a changed variable affects
+class FactorScheduler:
+    def __init__(self, max_rounds=100):
+        self.max_rounds = max_rounds
+        self.factors = []
+        self.by_action = {}        # action -> [factor]
+        self.by_variable = {}      # variable -> [factor]
+        self.every_action = []     # factors without actions/watches
+        self.dirty = {}            # changed variables (insertion ordered)
+        self.dispatching = False   # changes are only tracked inside dispatch()
+
+    def add(self, factor):
+        factor.order = len(self.factors)
+        self.factors.append(factor)
+        for v in factor.variables + factor.watches:
+            v.scheduler = self
+        for a in factor.actions:
+            self.by_action.setdefault(a, []).append(factor)
+        for v in factor.watches:
+            self.by_variable.setdefault(v, []).append(factor)
+        if not factor.actions and not factor.watches:
+            self.every_action.append(factor)
+
+    def mark_dirty(self, variable):
+        # Values set outside an action (e.g. by the game itself) are not
+        # rule changes; they must not fire watchers on the next action
+        if self.dispatching:
+            self.dirty[variable] = True
+
+    def dispatch(self, action):
+        self.dispatching = True
+        self.dirty = {}
+        try:
+            self._run(action)
+        finally:
+            self.dispatching = False
+            self.dirty = {}
+
+    def _run(self, action):
+        fired = self.by_action.get(action, []) + self.every_action
+        for f in sorted(fired, key=lambda f: f.order):
+            f.update(action)
+
+        # Re-fire rules watching changed variables until nothing changes
+        for _ in range(self.max_rounds):
+            if not self.dirty:
+                return
+            changed, self.dirty = self.dirty, {}
+            fired = {}
+            for v in changed:
+                for f in self.by_variable.get(v, []):
+                    fired[f] = True
+            for f in sorted(fired, key=lambda f: f.order):
+                f.update(action)
+        raise RuntimeError(f"Factor graph did not settle after {self.max_rounds} rounds")
+
+
+# ------------------------
+# Game rules
+# ------------------------
+class FactorGame:
+    def __init__(self, seed=None):
+        self.seed = random.randrange(2 ** 32) if seed is None else seed
+        self.rng = random.Random(self.seed)
+        self.history = []       # every action taken, for replay
+
+        # Variables (nodes in factor graph)
+        self.PlayerHP = Variable("PlayerHP", 100)
+        self.EnemyHP = Variable("EnemyHP", 0)
+        self.PlayerLocation = Variable("Location", "forest")
+        self.Inventory = Variable("Inventory", [])
+
+        # Factors (rules connected to variables)
+        self.factors = []
+        self.factors.append(Factor("Movement", self.movement_factor, [self.PlayerLocation],
+                                   actions=["GoCave", "GoRiver", "GoTreasure", "ReturnForest"]))
+        self.factors.append(Factor("Combat", self.combat_factor, [self.PlayerHP, self.EnemyHP],
+                                   actions=["Fight", "Attack", "Defend"]))
+        self.factors.append(Factor("Treasure", self.treasure_factor, [self.PlayerLocation, self.Inventory],
+                                   watches=[self.PlayerLocation]))
+
+        # Dispatch index: an action only runs the rules it affects
+        self.scheduler = FactorScheduler()
+        for f in self.factors:
+            self.scheduler.add(f)
+
+    # ------------------------
+    # Factor Functions (rules)
+    # ------------------------
+
+    # Movement rule
+    def movement_factor(self, vars, action):
+        loc = vars[0]
+        if action == "GoCave":
+            loc.value = "cave"
+        elif action == "GoRiver":
+            loc.value = "river"
+        elif action == "GoTreasure":
+            loc.value = "treasure"
+        elif action == "ReturnForest":
+            loc.value = "forest"
+
+    # Combat rule
+    def combat_factor(self, vars, action):
+        player, enemy = vars
+        if action == "Fight":   # start fight
+            enemy.value = ENEMY_HP
+            self.log("⚔️ A wild enemy appears!")
+        elif action == "Attack" and enemy.value > 0:   # attack enemy
+            dmg = self.rng.randint(*ATTACK_DAMAGE)
+            enemy.value = max(0, enemy.value - dmg)
+            self.log(f"You strike for {dmg}! Enemy HP = {enemy.value}")
+        elif action == "Defend" and enemy.value > 0:   # defend move
+            dmg = max(0, self.rng.randint(*ENEMY_DAMAGE) - self.rng.randint(*BLOCK))
+            player.value = max(0, player.value - dmg)
+            self.log(f"You defend! Enemy deals {dmg}. Player HP = {player.value}")
+
+    # Treasure rule
+    def treasure_factor(self, vars, action):
+        loc, inv = vars
+        if loc.value == "treasure":
+            inv.value = ["💰 Gold", "💎 Diamonds", "👑 Crown", "🗿 Ancient Relic"]
+            self.log("🎉 You found the treasure!")
+
+    # ------------------------
+    # Game Flow
+    # ------------------------
+    def take_action(self, action):
+        # Run the factors for this action, then whatever its changes trigger
+        self.history.append(action)
+        self.scheduler.dispatch(action)
+        # Player defeated
+        if self.PlayerHP.value <= 0:
+            self.Inventory.value = ["⚔️ Broken Sword", "🪨 Rocks", "🛡️ Torn Shield"]
+
+    def log(self, msg):
+        pass    # the GUI shows these; headless runs drop them
+
+    def snapshot(self):
+        return {v.name: v.value for v in (self.PlayerHP, self.EnemyHP, self.PlayerLocation, self.Inventory)}
+
+    def to_record(self):
+        return {"kind": "factor", "seed": self.seed, "actions": list(self.history),
+                "final": self.snapshot()}
+
+    def save_record(self, path=os.path.join("logs", "factor_sessions.jsonl")):
+        # Append this session for python -m engine.replay
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(self.to_record(), ensure_ascii=False) + "\n")
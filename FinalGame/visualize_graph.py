@@ -1,75 +1,30 @@
-import matplotlib.pyplot as plt
-import networkx as nx
+import os
+import sys
 
+# engine/ lives in the repo root, one level up
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
 
-def draw_factor_graph():
-    G = nx.DiGraph()
+from engine.factor_model import DiscreteModel
+from engine.graph_view import GraphView
+from engine.story_manager import load_story
 
-    # Nodes with layer info
-    G.add_node("Forest", layer=0)
-    G.add_node("Cave", layer=1)
-    G.add_node("River", layer=1)
-    G.add_node("Enemy", layer=2)
-    G.add_node("Cross River", layer=2)
-    G.add_node("Treasure", layer=3)
 
-    # Edges
-    G.add_edges_from([
-        ("Forest", "Cave"),
-        ("Forest", "River"),
-        ("Cave", "Enemy"),
-        ("River", "Cross River"),
-        ("Enemy", "Treasure"),
-        ("Cross River", "Treasure"),
-    ])
-
-    # Layout (hierarchy)
-    pos = nx.multipartite_layout(G, subset_key="layer")
-
-    # Thematic colors
-    color_map = {
-        "Forest": "green",
-        "Cave": "saddlebrown",
-        "River": "royalblue",
-        "Enemy": "crimson",
-        "Cross River": "purple",
-        "Treasure": "gold"
-    }
-
-    node_colors = [color_map.get(node, "lightgray") for node in G.nodes()]
-
-    # Draw edges
-    nx.draw_networkx_edges(
-        G, pos,
-        edge_color="black",
-        width=2,
-        arrows=True,
-        arrowstyle="-|>",
-        arrowsize=20
-    )
-
-    # Draw nodes
-    nx.draw_networkx_nodes(
-        G, pos,
-        node_size=3500,
-        node_color=node_colors,
-        edgecolors="black", linewidths=2
-    )
-
-    # Labels
-    nx.draw_networkx_labels(
-        G, pos,
-        font_size=11,
-        font_weight="bold",
-        font_color="black"
-    )
-
-    plt.title("🌲 Adventure Game Decision Graph 🗺️",
-              fontsize=16, fontweight="bold", pad=20)
-    plt.axis("off")
-    plt.tight_layout()
-    plt.show()
+def draw_factor_graph(story_path=os.path.join(ROOT, "data", "story.json"),
+                      factors_path=os.path.join(ROOT, "data", "factors.json"),
+                      out_path=None, size=(1200, 800)):
+    # Story graph built from the story file (any size), plus the factor model;
+    # saved to out_path, or opened in the default image viewer
+    model = DiscreteModel.from_json(factors_path) if os.path.exists(factors_path) else None
+    image = GraphView(load_story(story_path), model).render(size)
+    if out_path:
+        image.save(out_path)
+    else:
+        image.show()
+    return image
 
 
 if __name__ == "__main__":
-    draw_factor_graph()
+    # python FinalGame/visualize_graph.py [story.json] [out.png]
+    args = sys.argv[1:]
+    draw_factor_graph(*args[:1], out_path=args[1] if len(args) > 1 else None)
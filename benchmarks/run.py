@@ -0,0 +1,238 @@
+# benchmarks/run.py
+#
+# Headless, reproducible benchmarks for the game's hot paths.
+#
+#   python benchmarks/run.py                              # all sizes, writes bench_results.json
+#   python benchmarks/run.py --quick                      # small stories only
+#   python benchmarks/run.py --save-baseline benchmarks/baseline.json
+#   python benchmarks/run.py --compare benchmarks/baseline.json --tolerance 0.25
+#
+# Every result is a rate (higher is better) so comparisons are uniform.
+# --compare exits with status 1 if anything got slower than the tolerance.
+
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+# Allow running as a script from the repo root
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from engine.asset_cache import ImageCache
+from engine.fade import build_fade_frames
+from engine.factor_graph_ai import AIDecisionEngine
+from engine.game_state import GameState, Journal, load_game, save_game
+from engine.story_manager import StoryManager
+from engine.story_pack import convert, MappedStoryManager
+
+SIZES = [6, 1000, 10000, 100000]
+QUICK_SIZES = [6, 1000]
+SEED = 440
+IMAGE = os.path.join(ROOT, "assets", "cave.png")
+
+
+# ------------------------
+# Synthetic stories
+# ------------------------
+def make_story(n, seed=SEED):
+    # Layered story: every node links forward, the last 10% are endings.
+    # n == 6 returns the shipped story so the smallest case is the real one.
+    if n == 6:
+        with open(os.path.join(ROOT, "data", "story.json")) as f:
+            return json.load(f)
+    rng = random.Random(seed)
+    ids = ["start"] + [f"node{i}" for i in range(1, n)]
+    endings = max(1, n // 10)
+    story = {}
+    for i, node_id in enumerate(ids):
+        choices = {}
+        if i < n - endings:
+            for label in rng.sample(["fight", "sneak", "rest", "left", "right", "wait"], 2):
+                choices[label] = {
+                    "next": ids[rng.randrange(i + 1, n)],
+                    "effects": {"energy": rng.randint(-2, 1), "reputation": rng.randint(-1, 2)},
+                }
+        story[node_id] = {"text": f"Scene {i}. " * 8, "image": "cave.png", "choices": choices}
+    return story
+
+
+def rate(func, min_time=0.5, repeat=3):
+    # Best-of-`repeat` calls per second of func(), each run lasting >= min_time
+    best = 0.0
+    for _ in range(repeat):
+        calls, t0 = 0, time.perf_counter()
+        while True:
+            func()
+            calls += 1
+            elapsed = time.perf_counter() - t0
+            if elapsed >= min_time:
+                break
+        best = max(best, calls / elapsed)
+    return best
+
+
+# ------------------------
+# Benchmarks
+# ------------------------
+def bench_ai(results):
+    ai = AIDecisionEngine()
+    rng = random.Random(SEED)
+    states = [(rng.randint(-1, 4), rng.randint(-1, 4)) for _ in range(1000)]
+    choices = {"rest": {}, "sneak": {}, "fight": {}}
+
+    def scalar():
+        for e, r in states:
+            ai.suggest(e, r, choices)
+    results["ai.suggest"] = (rate(scalar) * len(states), "suggestions/s")
+
+    energies = [e for e, _ in states] * 100
+    reputations = [r for _, r in states] * 100
+    choice_sets = [choices] * len(energies)
+    results["ai.suggest_batch"] = (
+        rate(lambda: ai.suggest_batch(energies, reputations, choice_sets)) * len(energies),
+        "suggestions/s")
+
+
+def bench_story(results, sizes, workdir):
+    for n in sizes:
+        json_path = os.path.join(workdir, f"story_{n}.json")
+        with open(json_path, 'w') as f:
+            json.dump(make_story(n), f)
+        pack_path = os.path.join(workdir, f"story_{n}.pack")
+        convert(json_path, pack_path)
+
+        min_time = 0.5 if n < 10000 else 2.0
+        results[f"story.load.json[{n}]"] = (rate(lambda: StoryManager(json_path), min_time, 1), "loads/s")
+        results[f"story.load.pack[{n}]"] = (rate(lambda: MappedStoryManager(pack_path)), "loads/s")
+
+        manager = StoryManager(json_path)
+        rng = random.Random(SEED)
+        walk = {"state": GameState(), "node": "start"}
+
+        def steps(count=1000):
+            for _ in range(count):
+                node = walk["node"]
+                labels = manager.node_labels[manager.index[node]]
+                if not labels:
+                    walk["state"], node = GameState(), "start"
+                    labels = manager.node_labels[manager.index[node]]
+                walk["node"] = manager.make_choice(node, rng.choice(labels), walk["state"])
+        results[f"story.step[{n}]"] = (rate(steps) * 1000, "steps/s")
+
+
+def bench_images(results, workdir):
+    from PIL import Image
+    img = Image.open(IMAGE).convert("RGBA").resize((800, 400))
+    results["fade.frames"] = (rate(lambda: build_fade_frames(img)) * 21, "frames/s")
+
+    try:
+        lanczos = Image.Resampling.LANCZOS
+    except AttributeError:
+        lanczos = Image.LANCZOS
+    cache_dir = os.path.join(workdir, "images")
+
+    def cold():
+        shutil.rmtree(cache_dir, ignore_errors=True)
+        ImageCache(cache_dir).get(IMAGE, (1000, 700), "RGBA", lanczos)
+    results["image.load_resize.cold"] = (rate(cold), "images/s")
+    results["image.load_resize.disk"] = (
+        rate(lambda: ImageCache(cache_dir).get(IMAGE, (1000, 700), "RGBA", lanczos)), "images/s")
+    warm = ImageCache(cache_dir)
+    results["image.load_resize.memory"] = (
+        rate(lambda: warm.get(IMAGE, (1000, 700), "RGBA", lanczos)), "images/s")
+
+
+def bench_persistence(results, workdir):
+    path = os.path.join(workdir, "save.dat")
+    state = GameState()
+    state.inventory = [f"item{i}" for i in range(20)]
+
+    def round_trip():
+        save_game(state, "start", path)
+        load_game(path)
+    results["save_load.round_trip"] = (rate(round_trip), "round trips/s")
+
+    journal = Journal(path, checkpoint_every=1000)
+    journal.begin(state, "start")
+    effects = {"energy": -1, "reputation": 1}
+
+    def records(count=1000):
+        for _ in range(count):
+            journal.record("start", "left", effects, "cave")
+    results["journal.record"] = (rate(records) * 1000, "records/s")
+    journal.close()
+
+
+# ------------------------
+# Results
+# ------------------------
+def run(sizes):
+    results = {}
+    workdir = tempfile.mkdtemp(prefix="adventure-bench-")
+    try:
+        bench_ai(results)
+        bench_story(results, sizes, workdir)
+        bench_images(results, workdir)
+        bench_persistence(results, workdir)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return {
+        "meta": {"python": platform.python_version(), "platform": platform.platform(),
+                 "seed": SEED, "sizes": sizes, "time": time.strftime("%Y-%m-%dT%H:%M:%S")},
+        "results": {name: {"value": value, "unit": unit} for name, (value, unit) in results.items()},
+    }
+
+
+def compare(current, baseline, tolerance):
+    regressions = []
+    for name, base in baseline["results"].items():
+        now = current["results"].get(name)
+        if now is None:
+            continue
+        change = now["value"] / base["value"] - 1 if base["value"] else 0.0
+        flag = "REGRESSION" if change < -tolerance else ""
+        print(f"  {name:<32} {base['value']:>14,.0f} -> {now['value']:>14,.0f} {change:+7.1%} {flag}")
+        if flag:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Adventure Quest benchmark suite")
+    parser.add_argument("--out", default="bench_results.json")
+    parser.add_argument("--quick", action="store_true", help=f"only story sizes {QUICK_SIZES}")
+    parser.add_argument("--sizes", type=int, nargs="+", default=None)
+    parser.add_argument("--save-baseline", default=None)
+    parser.add_argument("--compare", default=None, help="baseline JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args()
+
+    sizes = args.sizes or (QUICK_SIZES if args.quick else SIZES)
+    current = run(sizes)
+    for name, r in current["results"].items():
+        print(f"{name:<34} {r['value']:>14,.0f} {r['unit']}")
+
+    with open(args.out, 'w') as f:
+        json.dump(current, f, indent=2)
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as f:
+            json.dump(current, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print(f"\nCompared with {args.compare} (tolerance {args.tolerance:.0%}):")
+        regressions = compare(current, baseline, args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s): {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+# engine/asset_cache.py
+#
+# Cache of decoded + resized images, so a scene image is only decoded and
+# resampled once per (source, size, mode) until the source file changes.
+#
+# Level 1: in-memory LRU of PIL images.
+# Level 2: raw pixel files in .cache/images, read back without PNG decoding.
+# Both are invalidated by the source file's mtime and size.
+#
+# prefetch() warms the cache on a small thread pool; a get() for an image
+# that is still being prefetched waits for that decode instead of redoing it.
+
+import hashlib
+import os
+import struct
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image
+
+from engine.profiling import span
+
+CACHE_DIR = os.path.join(".cache", "images")
+
+# source mtime_ns, source size, width, height, mode
+RAW_HEADER = struct.Struct("<QQII8s")
+
+
+class ImageCache:
+    def __init__(self, cache_dir=CACHE_DIR, max_items=32, prefetch_workers=2):
+        self.cache_dir = cache_dir
+        self.max_items = max_items
+        self.prefetch_workers = prefetch_workers
+        self._memory = OrderedDict()
+        self._pending = {}          # key -> Future of an in-flight prefetch
+        self._executor = None
+        self._lock = threading.RLock()
+
+    def get(self, path, size, mode="RGBA", resample=None):
+        key = (os.path.abspath(path), tuple(size), mode, resample)
+        with self._lock:
+            pending = self._pending.get(key)
+        if pending is not None:
+            try:
+                pending.result()
+            except Exception:
+                pass        # retried (and reported) by the load below
+        return self._load(key)
+
+    def prefetch(self, path, size, mode="RGBA", resample=None):
+        if not os.path.exists(path):
+            return None
+        key = (os.path.abspath(path), tuple(size), mode, resample)
+        with self._lock:
+            if key in self._memory or key in self._pending:
+                return self._pending.get(key)
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(self.prefetch_workers,
+                                                    thread_name_prefix="image-prefetch")
+            future = self._executor.submit(self._load, key)
+            self._pending[key] = future
+        future.add_done_callback(lambda f: self._forget(key, f))
+        return future
+
+    def _forget(self, key, future):
+        with self._lock:
+            if self._pending.get(key) is future:
+                del self._pending[key]
+
+    def _load(self, key):
+        path, size, mode, resample = key
+        st = os.stat(path)
+        stamp = (st.st_mtime_ns, st.st_size)
+
+        with self._lock:
+            hit = self._memory.get(key)
+            if hit is not None and hit[0] == stamp:
+                self._memory.move_to_end(key)
+                return hit[1]
+
+        disk_path = self._disk_path(key)
+        with span("image.disk_cache"):
+            img = self._read_disk(disk_path, stamp, size, mode)
+        if img is None:
+            with span("image.decode"):
+                img = Image.open(path).convert(mode)
+            with span("image.resize"):
+                img = img.resize(size) if resample is None else img.resize(size, resample)
+            self._write_disk(disk_path, stamp, img)
+
+        with self._lock:
+            self._memory[key] = (stamp, img)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_items:
+                self._memory.popitem(last=False)
+        return img
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+        if os.path.isdir(self.cache_dir):
+            for name in os.listdir(self.cache_dir):
+                if name.endswith(".raw"):
+                    os.remove(os.path.join(self.cache_dir, name))
+
+    def _disk_path(self, key):
+        digest = hashlib.sha1(repr(key).encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, digest + ".raw")
+
+    def _read_disk(self, disk_path, stamp, size, mode):
+        try:
+            with open(disk_path, 'rb') as f:
+                mtime, src_size, w, h, raw_mode = RAW_HEADER.unpack(f.read(RAW_HEADER.size))
+                if (mtime, src_size) != stamp or (w, h) != tuple(size) \
+                        or raw_mode.rstrip(b"\0").decode() != mode:
+                    return None
+                return Image.frombytes(mode, (w, h), f.read())
+        except (OSError, struct.error, ValueError):
+            return None
+
+    def _write_disk(self, disk_path, stamp, img):
+        # Best effort: a read-only or full disk only costs us the warm start
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp = f"{disk_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp, 'wb') as f:
+                f.write(RAW_HEADER.pack(stamp[0], stamp[1], img.width, img.height,
+                                        img.mode.encode()))
+                f.write(img.tobytes())
+            os.replace(tmp, disk_path)
+        except OSError:
+            pass
+
+
+image_cache = ImageCache()
+
+
+def load_resized(path, size, mode="RGBA", resample=None):
+    return image_cache.get(path, size, mode, resample)
+
+
+def prefetch_resized(path, size, mode="RGBA", resample=None):
+    return image_cache.prefetch(path, size, mode, resample)
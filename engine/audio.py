@@ -0,0 +1,126 @@
+# engine/audio.py
+#
+# Sound effects and background music with caching.
+#
+# - Sound effects are decoded once and kept.
+# - play_music() is a no-op when the requested track is already playing.
+# - preload_music() decodes upcoming tracks on a background thread so the
+#   next scene can start its music without touching the disk.
+# - With no pygame or no audio device every method quietly does nothing,
+#   so the game (and tests) run headless.
+# - With background=True pygame is imported and the mixer opened on a
+#   worker thread; sounds requested before it is ready are loaded then.
+
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+SOUND_DIR = os.path.join("assets", "sounds")
+
+
+class AudioManager:
+    def __init__(self, sound_dir=SOUND_DIR, max_tracks=4, background=False):
+        self.sound_dir = sound_dir
+        self.max_tracks = max_tracks
+        self.enabled = False
+        self._pygame = None
+        self._sounds = {}
+        self._tracks = OrderedDict()    # path -> Future[Sound], decoded music
+        self._current_track = None
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pending_sounds = []       # preloads asked for before init finished
+        self.ready = threading.Event()
+
+        if background:
+            threading.Thread(target=self._init_mixer, name="audio-init", daemon=True).start()
+        else:
+            self._init_mixer()
+
+    def _init_mixer(self):
+        try:
+            import pygame
+            pygame.mixer.init()
+            pygame.mixer.set_reserved(1)
+            self._music_channel = pygame.mixer.Channel(0)
+            self._pygame = pygame
+            self.enabled = True
+        except Exception:
+            pass    # no pygame / no audio device: stay silent
+        finally:
+            self.ready.set()
+        with self._lock:
+            pending, self._pending_sounds = self._pending_sounds, []
+        for name in pending:
+            self.preload_sound(name)
+
+    # ------------------------
+    # Sound effects
+    # ------------------------
+    def preload_sound(self, name):
+        if not self.ready.is_set():
+            with self._lock:
+                if not self.ready.is_set():
+                    self._pending_sounds.append(name)
+                    return None
+        if not self.enabled or name in self._sounds:
+            return self._sounds.get(name)
+        path = os.path.join(self.sound_dir, name)
+        sound = self._pygame.mixer.Sound(path) if os.path.exists(path) else None
+        self._sounds[name] = sound      # None is cached too: no repeat stat()
+        return sound
+
+    def play_sound(self, name):
+        sound = self.preload_sound(name)
+        if sound is not None:
+            sound.play()
+
+    # ------------------------
+    # Music
+    # ------------------------
+    def preload_music(self, path):
+        if not self.enabled or not os.path.exists(path):
+            return
+        with self._lock:
+            if path in self._tracks:
+                self._tracks.move_to_end(path)
+                return
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(1, thread_name_prefix="audio-preload")
+            self._tracks[path] = self._executor.submit(self._pygame.mixer.Sound, path)
+            while len(self._tracks) > self.max_tracks:
+                # drop the oldest decoded track, but never the one playing
+                oldest = next(p for p in self._tracks if p != self._current_track)
+                del self._tracks[oldest]
+
+    def play_music(self, path):
+        if not self.enabled:
+            return
+        if path == self._current_track and self._music_busy():
+            return      # same track, keep playing
+
+        with self._lock:
+            future = self._tracks.get(path)
+        sound = None
+        if future is not None and future.done() and future.exception() is None:
+            sound = future.result()
+
+        self.stop_music()
+        if sound is not None:
+            self._music_channel.play(sound, loops=-1)
+        else:
+            # Not decoded yet: stream it rather than wait
+            self._pygame.mixer.music.load(path)
+            self._pygame.mixer.music.play(-1)
+        self._current_track = path
+
+    def stop_music(self):
+        if not self.enabled:
+            return
+        self._music_channel.stop()
+        self._pygame.mixer.music.stop()
+        self._current_track = None
+
+    def _music_busy(self):
+        return self._music_channel.get_busy() or self._pygame.mixer.music.get_busy()
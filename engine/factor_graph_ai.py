@@ -1,27 +1,69 @@
 # engine/factor_graph_ai.py
-
-from pgmpy.models import FactorGraph
-from pgmpy.factors.discrete import DiscreteFactor
-from pgmpy.inference import BeliefPropagation
+#
+# pgmpy, networkx and matplotlib take seconds to import, so none of them is
+# imported at module load. Suggestions only need the NumPy potentials; the
+# pgmpy FactorGraph is built the first time `graph` is used. The game's
+# graph window draws with engine/graph_view.py (matplotlib's Agg API on a
+# worker thread), so playing never imports pgmpy or networkx.
+
+import json
+import numpy as np
+import os
 import random
-import matplotlib.pyplot as plt
-import networkx as nx
+
+from engine.factor_model import combine
+from engine.profiling import timed
 
 
 class AIDecisionEngine:
-    def __init__(self):
-        self.graph = FactorGraph()
+    def __init__(self, model_path=None, policy_path=None, seed=None):
+        self._graph = None          # pgmpy FactorGraph, built on first use
+        self._potentials = {}       # frozenset(scope) -> (scope, values)
+        self._version = 0           # bumped by every _set_factor()
+        # Tie-break RNG when no choice matches the suggested action. Callers
+        # with their own per-session RNG pass it as rng= instead.
+        self.rng = random.Random(seed)
         self._build_graph()
 
+        # Optional data-driven model (e.g. data/factors.json) over more
+        # variables than energy/reputation; used by suggest_for()
+        self.model = None
+        if model_path and os.path.exists(model_path):
+            from engine.factor_model import DiscreteModel
+            self.model = DiscreteModel.from_json(model_path)
+
+        # Optional solved whole-story policy (see engine/policy_solver.py);
+        # when present suggest_for() looks the best choice up in it
+        self.policy = None
+        if policy_path and os.path.exists(policy_path):
+            from engine.policy_solver import Policy
+            self.policy = Policy.load(policy_path)
+
         # Action mapping for inference
         self.action_map = {"rest": 0, "sneak": 1, "fight": 2}
         self.reverse_map = {v: k for k, v in self.action_map.items()}
 
-    def _build_graph(self):
-        self.graph.add_nodes_from(['energy', 'reputation', 'action'])
+        # Compiled evidence -> action table (rebuilt when factors change)
+        self._compiled_key = None
+        self._compile()
+
+    @property
+    def graph(self):
+        if self._graph is None:
+            from pgmpy.models import FactorGraph
+            from pgmpy.factors.discrete import DiscreteFactor
+            graph = FactorGraph()
+            graph.add_nodes_from(['energy', 'reputation', 'action'])
+            for scope, values in self._potentials.values():
+                factor = DiscreteFactor(list(scope), list(values.shape), values.ravel())
+                graph.add_factors(factor)
+                graph.add_edges_from([(v, factor) for v in scope])
+            self._graph = graph
+        return self._graph
 
+    def _build_graph(self):
         # Factor potential: (energy, reputation, action)
-        factor = DiscreteFactor(
+        self._set_factor(
             ['energy', 'reputation', 'action'],
             [3, 3, 3],  # energy: 0–2, reputation: 0–2, action: 0–2
             [
@@ -42,36 +84,119 @@ class AIDecisionEngine:
             ]
         )
 
-        self.graph.add_factors(factor)
-        self.graph.add_edges_from([
-            ('energy', factor),
-            ('reputation', factor),
-            ('action', factor)
-        ])
-
-    def suggest(self, energy, reputation, choices):
+    def _set_factor(self, scope, cards, table):
+        # Replace any factor over the same variables; suggest() recompiles
+        # its table automatically because the factor set changed.
+        scope = tuple(scope)
+        values = np.asarray(table, dtype=float).reshape(cards)
+        self._potentials[frozenset(scope)] = (scope, values)
+        self._version += 1
+        if self._graph is None:
+            return
+        from pgmpy.factors.discrete import DiscreteFactor
+        factor = DiscreteFactor(list(scope), list(cards), values.ravel())
+        for old in self._graph.get_factors():
+            if set(old.scope()) == set(scope):
+                self._graph.remove_factors(old)
+                if self._graph.has_node(old):
+                    self._graph.remove_node(old)
+        self._graph.add_factors(factor)
+        self._graph.add_edges_from([(v, factor) for v in scope])
+
+    def load_potential(self, path):
+        # Hot-load a learned factor (see engine/learner.py) without restarting
+        with open(path) as f:
+            data = json.load(f)
+        cards = [3] * len(data["scope"])
+        self._set_factor(data["scope"], cards, data["table"])
+        if self.model is not None:
+            self.model.set_factor(data["scope"], data["table"])
+
+    def _factors(self):
+        # (scope, values) pairs; once the pgmpy graph exists it is the source
+        # of truth, so factors edited through it are picked up too
+        if self._graph is None:
+            return list(self._potentials.values())
+        return [(tuple(f.scope()), f.values) for f in self._graph.get_factors()]
+
+    def _factor_key(self):
+        # Cheap per call: the setter version, plus the identity of the pgmpy
+        # factors once the graph exists (so factors added or removed through
+        # it are noticed). Edit tables through _set_factor/load_potential;
+        # arrays changed in place are not tracked.
+        if self._graph is None:
+            return self._version
+        return self._version, tuple(id(f) for f in self._graph.get_factors())
+
+    def _compile(self):
+        # Multiply all factors into one (energy, reputation, action) table.
+        # With every variable in the same clique, MAP(action | evidence) is
+        # just the argmax over the action axis of that table.
+        potential = combine(self._factors(), ('energy', 'reputation', 'action'))
+
+        self.policy_table = potential.argmax(axis=-1)
+        self.action_marginals = potential / potential.sum(axis=-1, keepdims=True)
+        self._compiled_key = self._factor_key()
+
+    def _ensure_compiled(self):
+        if self._factor_key() != self._compiled_key:
+            self._compile()
+
+    @timed("ai.suggest")
+    def suggest(self, energy, reputation, choices, rng=None):
         # Map energy and rep to [0–2]
         energy = max(0, min(2, energy))
         reputation = max(0, min(2, reputation))
 
-        inference = BeliefPropagation(self.graph)
-        result = inference.map_query(
-            variables=['action'],
-            evidence={'energy': energy, 'reputation': reputation}
-        )
-
-        best_action_idx = result['action']
-        best_action = self.reverse_map.get(best_action_idx)
-
+        self._ensure_compiled()
+        best_action_idx = int(self.policy_table[energy, reputation])
+        return self._match_choice(self.reverse_map.get(best_action_idx), choices, rng)
+
+    @timed("ai.suggest_for")
+    def suggest_for(self, state, node_id=None, choices=(), visited=(), rng=None):
+        # Suggestion from the solved policy if there is one, else using
+        # everything the data model knows about (inventory, location,
+        # visited nodes, ...); falls back to the 3x3 table.
+        if self.policy is not None:
+            best = self.policy.suggest(state, node_id)
+            if best in choices:
+                return best
+        if self.model is None or 'action' not in self.model.variables:
+            return self.suggest(state.energy, state.reputation, choices, rng)
+        evidence = self.model.evidence_for(state, node_id, visited)
+        best_action = self.model.map_query(['action'], evidence)['action']
+        return self._match_choice(best_action, choices, rng)
+
+    def suggest_batch(self, energies, reputations, choice_sets, rng=None):
+        # Same as suggest(), but for whole arrays of player states at once.
+        # Returns (suggestions, marginals) where marginals[i] is
+        # P(action | energy[i], reputation[i]) in rest/sneak/fight order.
+        energies = np.clip(np.asarray(energies), 0, 2).astype(np.intp)
+        reputations = np.clip(np.asarray(reputations), 0, 2).astype(np.intp)
+
+        self._ensure_compiled()
+        best = self.policy_table[energies, reputations]
+        marginals = self.action_marginals[energies, reputations]
+
+        suggestions = [
+            self._match_choice(self.reverse_map.get(int(a)), choices, rng)
+            for a, choices in zip(best, choice_sets)
+        ]
+        return suggestions, marginals
+
+    def _match_choice(self, best_action, choices, rng=None):
         # Try to match the action name in available choices
         for c in choices:
             if best_action in c.lower():
                 return c
 
         # fallback: random
-        return random.choice(list(choices))
+        return (rng or self.rng).choice(list(choices))
 
     def show_graph(self):
+        import matplotlib.pyplot as plt
+        import networkx as nx
+
         G = nx.Graph()
         G.add_node("energy", color='skyblue')
         G.add_node("reputation", color='lightgreen')
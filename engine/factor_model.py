@@ -0,0 +1,179 @@
+# engine/factor_model.py
+#
+# Data-driven discrete factor graph with exact inference by variable
+# elimination. Models are loaded from JSON next to the story, e.g.
+# data/factors.json:
+#
+#   {
+#     "variables": {
+#       "energy":  {"states": [0, 1, 2], "source": "energy"},
+#       "has_gem": {"states": [false, true], "source": "inventory:gem"},
+#       "action":  {"states": ["rest", "sneak", "fight"]}
+#     },
+#     "factors": [
+#       {"scope": ["energy", "action"], "table": [...]},     # row-major
+#       {"scope": ["has_gem", "action"], "table": [...]}
+#     ]
+#   }
+#
+# "source" says where evidence for a variable comes from (see evidence_for):
+#   energy / reputation / any GameState attribute   numeric, clamped to states
+#   inventory:<item>                                item is held
+#   visited:<node>                                  node was visited
+#   node                                            current story node id
+#
+# The elimination order for each (query, evidence variables) pattern is
+# computed once with the min-fill heuristic and reused for every query with
+# that pattern, so only the NumPy products run per call. MAP answers are
+# memoised per evidence, so repeated queries (the GUI asks on every scene)
+# are a dict lookup until a factor changes.
+
+import json
+
+import numpy as np
+
+
+def combine(factors, out_vars):
+    # Multiply factors and sum out everything not in out_vars (one einsum)
+    symbols, args = {}, []
+    for scope, table in factors:
+        args += [table, [symbols.setdefault(v, len(symbols)) for v in scope]]
+    args.append([symbols[v] for v in out_vars])
+    return np.einsum(*args)
+
+
+class DiscreteModel:
+    def __init__(self, variables, factors, sources=None):
+        # variables: {name: [state, ...]}; factors: [(scope, flat or shaped table)]
+        self.variables = {name: list(states) for name, states in variables.items()}
+        self.sources = dict(sources or {})
+        self._state_index = {name: {s: i for i, s in enumerate(states)}
+                             for name, states in self.variables.items()}
+        self.factors = []
+        for scope, table in factors:
+            scope = tuple(scope)
+            unknown = [v for v in scope if v not in self.variables]
+            if unknown:
+                raise ValueError(f"Factor over {scope} uses undeclared variables {unknown}")
+            shape = tuple(len(self.variables[v]) for v in scope)
+            self.factors.append((scope, np.asarray(table, dtype=float).reshape(shape)))
+        self._orders = {}
+        self._maps = {}             # (variables, evidence items) -> MAP assignment
+
+    @classmethod
+    def from_dict(cls, data):
+        variables, sources = {}, {}
+        for name, spec in data["variables"].items():
+            variables[name] = spec["states"]
+            if "source" in spec:
+                sources[name] = spec["source"]
+        factors = [(f["scope"], f["table"]) for f in data["factors"]]
+        return cls(variables, factors, sources)
+
+    @classmethod
+    def from_json(cls, path):
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
+
+    def set_factor(self, scope, table):
+        # Replace the factor over the same variables (or add a new one)
+        scope = tuple(scope)
+        shape = tuple(len(self.variables[v]) for v in scope)
+        new = (scope, np.asarray(table, dtype=float).reshape(shape))
+        self._maps.clear()
+        for i, (old_scope, _) in enumerate(self.factors):
+            if set(old_scope) == set(scope):
+                self.factors[i] = new
+                break
+        else:
+            self.factors.append(new)
+            self._orders.clear()    # graph structure changed
+
+    # ------------------------
+    # Evidence
+    # ------------------------
+    def evidence_for(self, state, node_id=None, visited=()):
+        evidence = {}
+        for name, source in self.sources.items():
+            states = self.variables[name]
+            if source == "node":
+                if node_id in self._state_index[name]:
+                    evidence[name] = node_id
+            elif source.startswith("inventory:"):
+                evidence[name] = state.has(source.split(":", 1)[1])
+            elif source.startswith("visited:"):
+                evidence[name] = source.split(":", 1)[1] in visited
+            elif hasattr(state, source):
+                # numeric stat: clamp into the declared range
+                evidence[name] = max(states[0], min(states[-1], getattr(state, source)))
+        return evidence
+
+    # ------------------------
+    # Inference
+    # ------------------------
+    def elimination_order(self, query, evidence_vars):
+        key = (tuple(query), frozenset(evidence_vars))
+        order = self._orders.get(key)
+        if order is None:
+            order = self._orders[key] = self._min_fill_order(query, evidence_vars)
+        return order
+
+    def _min_fill_order(self, query, evidence_vars):
+        active = [v for v in self.variables if v not in evidence_vars]
+        neighbors = {v: set() for v in active}
+        for scope, _ in self.factors:
+            scope = [v for v in scope if v not in evidence_vars]
+            for v in scope:
+                neighbors[v].update(u for u in scope if u != v)
+
+        hidden = [v for v in active if v not in query]
+        order = []
+        while hidden:
+            def cost(v):
+                nb = list(neighbors[v])
+                fill = sum(1 for i, a in enumerate(nb) for b in nb[i + 1:] if b not in neighbors[a])
+                return fill, len(nb)
+            v = min(hidden, key=cost)
+            nb = neighbors.pop(v)
+            for a in nb:
+                neighbors[a].discard(v)
+                neighbors[a].update(u for u in nb if u != a)
+            hidden.remove(v)
+            order.append(v)
+        return order
+
+    def _reduce(self, evidence):
+        reduced = []
+        for scope, table in self.factors:
+            if any(v in evidence for v in scope):
+                index = tuple(self._state_index[v][evidence[v]] if v in evidence else slice(None)
+                              for v in scope)
+                table = table[index]
+                scope = tuple(v for v in scope if v not in evidence)
+            reduced.append((scope, table))
+        return reduced
+
+    def query(self, variables, evidence=None):
+        # Posterior P(variables | evidence) as an array in `variables` order
+        variables = tuple(variables)
+        evidence = evidence or {}
+        factors = self._reduce(evidence)
+        for v in self.elimination_order(variables, evidence):
+            involved = [f for f in factors if v in f[0]]
+            if not involved:
+                continue
+            factors = [f for f in factors if v not in f[0]]
+            out = tuple(dict.fromkeys(u for scope, _ in involved for u in scope if u != v))
+            factors.append((out, combine(involved, out)))
+        result = combine(factors, variables)
+        return result / result.sum()
+
+    def map_query(self, variables, evidence=None):
+        variables = tuple(variables)
+        key = (variables, frozenset((evidence or {}).items()))
+        best = self._maps.get(key)
+        if best is None:
+            posterior = self.query(variables, evidence)
+            index = np.unravel_index(int(posterior.argmax()), posterior.shape)
+            best = self._maps[key] = {v: self.variables[v][i] for v, i in zip(variables, index)}
+        return dict(best)
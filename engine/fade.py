@@ -0,0 +1,106 @@
+# engine/fade.py
+#
+# Precomputed fade-in frames for scene backgrounds.
+#
+# Each frame matches ImageEnhance.Brightness(img).enhance(alpha): colour
+# bands are scaled by alpha, the alpha band is left alone. Frames are built
+# once per image from NumPy lookup tables and kept in a byte-bounded LRU,
+# so repeat visits to a scene do no image work at all.
+
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from engine.profiling import span
+
+FADE_STEPS = 20
+FADE_DELTA = 0.05
+
+
+def fade_alphas(steps=FADE_STEPS, delta=FADE_DELTA):
+    # Same float accumulation as the old `self.alpha += 0.05` loop
+    alphas, alpha = [], 0.0
+    while alpha < 1.0 and len(alphas) < steps:
+        alphas.append(alpha)
+        alpha += delta
+    return alphas
+
+
+def fade_tables(bands, alphas):
+    # One point() lookup table per frame, built in a single NumPy pass:
+    # colour bands map v -> int(v * alpha), an alpha band maps to itself.
+    levels = np.arange(256, dtype=np.float32)
+    tables = np.empty((len(alphas), len(bands), 256), dtype=np.uint8)
+    tables[:] = levels * np.asarray(alphas, dtype=np.float32)[:, None, None]
+    if 'A' in bands:
+        tables[:, bands.index('A')] = np.arange(256)
+    return tables.reshape(len(alphas), -1)
+
+
+def build_fade_frames(img, alphas=None):
+    # Returns the dimmed frames followed by the untouched image
+    alphas = fade_alphas() if alphas is None else alphas
+    tables = fade_tables(img.getbands(), alphas)
+    return [img.point(table.tolist()) for table in tables] + [img]
+
+
+class FadeSequence:
+    # Frames of one fade; `convert` (e.g. ImageTk.PhotoImage) is applied to
+    # a frame the first time it is shown and the result kept.
+    def __init__(self, source, frames, convert=None):
+        self.source = source
+        self.frames = frames
+        self.convert = convert
+        self._converted = [None] * len(frames)
+
+    def __len__(self):
+        return len(self.frames)
+
+    def __getitem__(self, i):
+        if self.convert is None:
+            return self.frames[i]
+        if self._converted[i] is None:
+            self._converted[i] = self.convert(self.frames[i])
+        return self._converted[i]
+
+
+class FadeCache:
+    def __init__(self, max_bytes=128 * 1024 * 1024, alphas=None):
+        self.max_bytes = max_bytes
+        self.alphas = fade_alphas() if alphas is None else alphas
+        self._entries = OrderedDict()   # key -> (FadeSequence, nbytes)
+        self._bytes = 0
+        self.frames_built = 0
+        self.build_seconds = 0.0
+
+    @property
+    def ms_per_frame(self):
+        return 1000 * self.build_seconds / self.frames_built if self.frames_built else 0.0
+
+    def get(self, key, img, convert=None):
+        entry = self._entries.get(key)
+        if entry is not None and entry[0].source is img:
+            self._entries.move_to_end(key)
+            return entry[0]
+        if entry is not None:
+            self._drop(key)
+
+        t0 = time.perf_counter()
+        with span("fade.build"):
+            frames = build_fade_frames(img, self.alphas)
+        self.build_seconds += time.perf_counter() - t0
+        self.frames_built += len(frames)
+
+        seq = FadeSequence(img, frames, convert)
+        # Count converted frames too: a PhotoImage holds its own pixel copy
+        nbytes = len(frames) * img.width * img.height * len(img.getbands()) * (2 if convert else 1)
+        self._entries[key] = (seq, nbytes)
+        self._bytes += nbytes
+        while self._bytes > self.max_bytes and len(self._entries) > 1:
+            self._drop(next(iter(self._entries)))
+        return seq
+
+    def _drop(self, key):
+        _, nbytes = self._entries.pop(key)
+        self._bytes -= nbytes
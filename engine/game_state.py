@@ -1,25 +1,352 @@
 # engine/game_state.py
-import pickle
+import json
+import os
+import queue
+import sys
+import threading
+
+from engine.profiling import timed
+
+SAVE_VERSION = 1
+JOURNAL_VERSION = 1
+
+
+# ------------------------
+# Item interning
+# ------------------------
+# Item names are interned to small ints shared by every GameState in the
+# process, so an inventory is a tuple of ints (plus a bitset for "has it")
+# instead of a list of strings per state.
+_item_names = []
+_item_ids = {}
+
+
+def item_id(name):
+    i = _item_ids.get(name)
+    if i is None:
+        i = _item_ids[name] = len(_item_names)
+        _item_names.append(sys.intern(name))
+    return i
+
+
+def item_name(i):
+    return _item_names[i]
+
+
+class Inventory(list):
+    # The list GameState.inventory hands out: a snapshot of the item names
+    # that writes itself back to its state whenever it is changed in place,
+    # so `state.inventory.append(item)` and `+=` work as they did when the
+    # inventory was a plain list attribute.
+    __slots__ = ("_state",)
+
+    def __init__(self, state, items):
+        super().__init__(items)
+        self._state = state
+
+    def _mutator(name):
+        method = getattr(list, name)
+
+        def mutate(self, *args, **kwargs):
+            result = method(self, *args, **kwargs)
+            self._state.inventory = self
+            return result
+        mutate.__name__ = name
+        return mutate
+
+    append = _mutator("append")
+    extend = _mutator("extend")
+    insert = _mutator("insert")
+    remove = _mutator("remove")
+    pop = _mutator("pop")
+    clear = _mutator("clear")
+    sort = _mutator("sort")
+    reverse = _mutator("reverse")
+    __setitem__ = _mutator("__setitem__")
+    __delitem__ = _mutator("__delitem__")
+    __iadd__ = _mutator("__iadd__")
+    __imul__ = _mutator("__imul__")
+    del _mutator
+
+    def __reduce__(self):
+        return list, (list(self),)
 
 
 class GameState:
+    # Compact: no per-instance __dict__, stats are plain ints, and the
+    # inventory is stored as an immutable tuple of item IDs in pickup order.
+    # Because that tuple is never mutated in place, clone() shares it with
+    # the original (copy-on-write) and costs the same for any inventory size.
+    __slots__ = ("name", "energy", "reputation", "_items", "_held")
+
     def __init__(self):
         self.name = "Player"
         self.energy = 3
         self.reputation = 0
-        self.inventory = []
+        self._items = ()        # item IDs, duplicates kept
+        self._held = 0          # bit i set <=> item ID i is held
+
+    @property
+    def inventory(self):
+        # Item names in pickup order, as a list that writes changes back
+        return Inventory(self, [_item_names[i] for i in self._items])
+
+    @inventory.setter
+    def inventory(self, items):
+        self._items = tuple(item_id(item) for item in items)
+        held = 0
+        for i in self._items:
+            held |= 1 << i
+        self._held = held
+
+    def has(self, item):
+        i = _item_ids.get(item)
+        return i is not None and bool(self._held >> i & 1)
+
+    def count(self, item):
+        i = _item_ids.get(item)
+        return 0 if i is None else self._items.count(i)
+
+    def clone(self):
+        state = GameState.__new__(GameState)
+        state.name = self.name
+        state.energy = self.energy
+        state.reputation = self.reputation
+        state._items = self._items
+        state._held = self._held
+        return state
+
+    __copy__ = clone
 
     def apply_effects(self, effects):
-        self.energy += effects.get("energy", 0)
-        self.reputation += effects.get("reputation", 0)
-        self.inventory += effects.get("inventory", [])
+        self.apply_delta(effects.get("energy", 0),
+                         effects.get("reputation", 0),
+                         effects.get("inventory", []))
+
+    def apply_delta(self, energy=0, reputation=0, items=()):
+        self.energy += energy
+        self.reputation += reputation
+        if items:
+            ids = tuple(item_id(item) for item in items)
+            self._items += ids
+            for i in ids:
+                self._held |= 1 << i
+
+    def to_dict(self):
+        return {"name": self.name, "energy": self.energy,
+                "reputation": self.reputation, "inventory": list(self.inventory)}
+
+    @classmethod
+    def from_dict(cls, data):
+        state = cls()
+        state.name = data.get("name", state.name)
+        state.energy = data.get("energy", state.energy)
+        state.reputation = data.get("reputation", state.reputation)
+        state.inventory = data.get("inventory", [])
+        return state
+
+    # Item IDs are only valid inside one process; pickle by name so states
+    # can be sent to worker processes
+    def __getstate__(self):
+        return self.to_dict()
 
+    def __setstate__(self, data):
+        self.name = data["name"]
+        self.energy = data["energy"]
+        self.reputation = data["reputation"]
+        self.inventory = data["inventory"]
 
-def save_game(state, node, path='save.dat'):
-    with open(path, 'wb') as f:
-        pickle.dump((state, node), f)
+    def __repr__(self):
+        return (f"GameState(name={self.name!r}, energy={self.energy}, "
+                f"reputation={self.reputation}, inventory={list(self.inventory)!r})")
+
+
+# ------------------------
+# Save files
+# ------------------------
+# save.dat          versioned JSON checkpoint: state, node, seq, seed, game
+# save.dat.journal  append-only JSON lines, one per choice made after the
+#                   checkpoint; records with seq <= checkpoint seq are stale,
+#                   and so is the whole journal if its header names another
+#                   game (seq restarts at 0 for every new game)
+# The player's own save (Save button) is save.dat with no journal; the
+# Journal autosave uses its own slot, autosave.dat, so starting or loading
+# a game never overwrites what the player saved.
+SAVE_PATH = 'save.dat'
+AUTOSAVE_PATH = 'autosave.dat'
+
+def journal_path(path):
+    return path + ".journal"
+
+
+def _write_checkpoint(path, state, node, seq=0, seed=None, game=None):
+    data = {"version": SAVE_VERSION, "state": state.to_dict(),
+            "node": node, "seq": seq, "seed": seed, "game": game}
+    tmp = path + ".tmp"
+    with open(tmp, 'w') as f:
+        json.dump(data, f)
+    os.replace(tmp, path)   # atomic, so a crash never leaves half a save
+
+
+@timed("game.save")
+def save_game(state, node, path=SAVE_PATH, seed=None):
+    _write_checkpoint(path, state, node, seed=seed)
+    if os.path.exists(journal_path(path)):
+        os.remove(journal_path(path))
 
 
 def load_game(path='save.dat'):
-    with open(path, 'rb') as f:
-        return pickle.load(f)
+    state, node, _ = load_save(path)
+    return state, node
+
+
+@timed("game.load")
+def load_save(path='save.dat'):
+    # (state, node, seed): last checkpoint plus every journal record written
+    # after it, and the session seed stored with the game
+    checkpoint = read_checkpoint(path)
+    node = checkpoint["node"]
+    for _, record in journal_steps(path, checkpoint):
+        node = record["next"]
+    return checkpoint["state"], node, checkpoint["seed"]
+
+
+def read_checkpoint(path='save.dat', missing_ok=False):
+    # The checkpoint as {"state": GameState, "node", "seq", "seed", "game"};
+    # with missing_ok a missing file reads as a new game
+    if missing_ok and not os.path.exists(path):
+        return {"state": GameState(), "node": "start", "seq": 0, "seed": None, "game": None}
+    with open(path) as f:
+        data = json.load(f)
+    if data.get("version") != SAVE_VERSION:
+        raise ValueError(f"Unsupported save version {data.get('version')} in {path}")
+    return {"state": GameState.from_dict(data["state"]), "node": data["node"],
+            "seq": data.get("seq", 0), "seed": data.get("seed"), "game": data.get("game")}
+
+
+def journal_steps(path, checkpoint):
+    # (state before the choice, record) for every journal record of the save
+    # at `path` made after `checkpoint`. checkpoint["state"] is advanced in
+    # place, so once exhausted it is the state after the last record.
+    state = checkpoint["state"]
+    for record in _read_journal(journal_path(path), checkpoint["game"]):
+        if record["seq"] <= checkpoint["seq"]:
+            continue
+        before = state.clone()
+        state.apply_effects(record.get("effects", {}))
+        yield before, record
+
+
+def _read_journal(path, game=None):
+    if not os.path.exists(path):
+        return
+    with open(path) as f:
+        header = f.readline()
+        if not header:
+            return
+        header = json.loads(header)
+        version = header.get("journal")
+        if version != JOURNAL_VERSION:
+            raise ValueError(f"Unsupported journal version {version} in {path}")
+        if header.get("game") != game:
+            return      # left over from a previous game (crash before truncation)
+        for line in f:
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                return      # torn final write after a crash
+
+
+class Journal:
+    # Autosave: record() only puts a tuple on a queue; a background thread
+    # appends it to the journal and writes a compact checkpoint every
+    # `checkpoint_every` records. The writer keeps its own copy of the state,
+    # rebuilt from the recorded effects, so it never touches the UI's state.
+    # A failed write does not stop the writer: the error is kept and raised
+    # by the next flush(), and the next record retries with a checkpoint.
+    def __init__(self, path=AUTOSAVE_PATH, checkpoint_every=50):
+        self.path = path
+        self.checkpoint_every = checkpoint_every
+        self.error = None       # first write failure since the last flush()
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="journal-writer", daemon=True)
+        self._thread.start()
+
+    def begin(self, state, node, seed=None):
+        # Start a new journal from this state (new game or after loading)
+        self._queue.put(("begin", GameState.from_dict(state.to_dict()), node, seed))
+
+    def record(self, node, choice, effects, next_node):
+        self._queue.put(("record", node, choice, effects, next_node))
+
+    def checkpoint(self):
+        self._queue.put(("checkpoint",))
+
+    def flush(self):
+        self._queue.join()
+        error, self.error = self.error, None
+        if error is not None:
+            raise error
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+
+    def _run(self):
+        journal = None
+        state, node, seq, seed, game, since_checkpoint = None, None, 0, None, None, 0
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    break
+                kind = item[0]
+                if kind == "begin":
+                    _, state, node, seed = item
+                    seq, game = 0, os.urandom(8).hex()
+                    journal = self._compact(journal, state, node, seq, seed, game)
+                    since_checkpoint = 0
+                elif kind == "record" and state is not None:
+                    _, prev, choice, effects, next_node = item
+                    line = json.dumps({"seq": seq + 1, "node": prev, "choice": choice,
+                                       "effects": effects, "next": next_node}) + "\n"
+                    seq += 1
+                    state.apply_effects(effects)
+                    node = next_node
+                    if journal is None or journal.closed:
+                        # An earlier checkpoint failed; the new one covers this record
+                        journal = self._compact(journal, state, node, seq, seed, game)
+                        since_checkpoint = 0
+                    else:
+                        journal.write(line)
+                        since_checkpoint += 1
+                    if since_checkpoint >= self.checkpoint_every:
+                        journal = self._compact(journal, state, node, seq, seed, game)
+                        since_checkpoint = 0
+                elif kind == "checkpoint" and state is not None:
+                    journal = self._compact(journal, state, node, seq, seed, game)
+                    since_checkpoint = 0
+
+                # Batch writes: only flush once the queue has drained
+                if journal is not None and not journal.closed and self._queue.empty():
+                    journal.flush()
+            except Exception as e:
+                # Keep writing later records; flush() reports this one
+                if self.error is None:
+                    self.error = e
+            finally:
+                self._queue.task_done()
+        if journal is not None and not journal.closed:
+            journal.close()
+
+    @timed("game.checkpoint")
+    def _compact(self, journal, state, node, seq, seed, game):
+        # Checkpoint first, then drop the journal; if we crash in between,
+        # the old records are skipped on load: their seq is covered, or
+        # (after begin() restarts seq) the journal header names another game.
+        if journal is not None:
+            journal.close()
+        _write_checkpoint(self.path, state, node, seq, seed, game)
+        journal = open(journal_path(self.path), 'w')
+        journal.write(json.dumps({"journal": JOURNAL_VERSION, "game": game}) + "\n")
+        return journal
@@ -0,0 +1,182 @@
+# engine/graph_view.py
+#
+# Story graph (and factor model) picture for the GUI.
+#
+# - The graph comes from the loaded story, not a hand-written node list.
+# - The layout is layered (distance from the start node), computed with
+#   NumPy and cached on disk per story version, so it is only recomputed
+#   when nodes or links change. Text edits keep the cached layout.
+# - Rendering uses matplotlib's object-oriented Agg API (no pyplot, no
+#   window), so it can run on a worker thread; the GUI polls the Future
+#   and shows the finished PIL image. Edges are drawn as one LineCollection
+#   and labels only for small stories, so thousands of nodes stay quick.
+
+import hashlib
+import io
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+CACHE_DIR = os.path.join(".cache", "graph")
+MAX_LABELS = 60         # node labels are drawn up to this many nodes
+
+
+def _structure(manager):
+    # (node_ids, edge sources, edge targets) for StoryManager or a story pack
+    if hasattr(manager, "choice_offsets"):
+        offsets = np.asarray(manager.choice_offsets, dtype=np.int64)
+        src = np.repeat(np.arange(len(manager.node_ids)), np.diff(offsets))
+        tgt = np.asarray(manager.choice_targets, dtype=np.int64)
+        keep = tgt >= 0
+        return list(manager.node_ids), src[keep], tgt[keep]
+
+    node_ids = list(manager.story)
+    index = {node_id: i for i, node_id in enumerate(node_ids)}
+    src, tgt = [], []
+    for i, node_id in enumerate(node_ids):
+        for data in manager.story[node_id].get("choices", {}).values():
+            j = index.get(data.get("next"))
+            if j is not None:
+                src.append(i)
+                tgt.append(j)
+    return node_ids, np.array(src, dtype=np.int64), np.array(tgt, dtype=np.int64)
+
+
+def story_version(node_ids, src, tgt):
+    # Changes when nodes or links change, not when text/effects do
+    h = hashlib.sha1()
+    h.update("\0".join(node_ids).encode("utf-8"))
+    h.update(src.tobytes())
+    h.update(tgt.tobytes())
+    return h.hexdigest()[:16]
+
+
+def layered_layout(n, src, tgt, start=0):
+    # x = breadth-first depth from `start` (unreachable nodes go last),
+    # y = order within the layer by the mean y of parents in earlier layers
+    depth = np.full(n, -1, dtype=np.int64)
+    order = np.argsort(src, kind="stable")
+    out_off = np.searchsorted(src[order], np.arange(n + 1))
+    out_tgt = tgt[order]
+
+    frontier, d = np.array([start], dtype=np.int64), 0
+    if n:
+        depth[start] = 0
+    while len(frontier):
+        counts = out_off[frontier + 1] - out_off[frontier]
+        first = np.repeat(np.cumsum(counts) - counts, counts)
+        nxt = out_tgt[np.repeat(out_off[frontier], counts) + (np.arange(counts.sum()) - first)]
+        nxt = np.unique(nxt[depth[nxt] < 0])
+        d += 1
+        depth[nxt] = d
+        frontier = nxt
+    depth[depth < 0] = depth.max(initial=0) + 1
+
+    y = np.zeros(n)
+    down = depth[src] < depth[tgt]
+    e_src, e_tgt = src[down], tgt[down]
+    for layer in range(depth.max(initial=0) + 1):
+        nodes = np.flatnonzero(depth == layer)
+        into = depth[e_tgt] == layer
+        weight = np.bincount(e_tgt[into], weights=y[e_src[into]], minlength=n)[nodes]
+        parents = np.bincount(e_tgt[into], minlength=n)[nodes]
+        bary = np.where(parents > 0, weight / np.maximum(parents, 1), np.inf)
+        ranked = nodes[np.argsort(bary, kind="stable")]
+        y[ranked] = np.linspace(0.0, 1.0, len(ranked)) if len(ranked) > 1 else 0.5
+
+    return np.column_stack([depth.astype(float), y])
+
+
+class GraphView:
+    def __init__(self, manager, model=None, cache_dir=CACHE_DIR):
+        self.manager = manager
+        self.model = model
+        self.cache_dir = cache_dir
+        self.node_ids, self.src, self.tgt = _structure(manager)
+        self.index = {node_id: i for i, node_id in enumerate(self.node_ids)}
+        self.version = story_version(self.node_ids, self.src, self.tgt)
+        self._pos = None
+        self._executor = ThreadPoolExecutor(1, thread_name_prefix="graph-render")
+
+    def layout(self):
+        if self._pos is None:
+            path = os.path.join(self.cache_dir, f"layout-{self.version}.npy")
+            try:
+                pos = np.load(path)
+                if pos.shape != (len(self.node_ids), 2):
+                    raise ValueError("stale layout")
+            except (OSError, ValueError):
+                start = self.index.get(getattr(self.manager, "start", "start"), 0)
+                pos = layered_layout(len(self.node_ids), self.src, self.tgt, start)
+                os.makedirs(self.cache_dir, exist_ok=True)
+                tmp = f"{path}.{os.getpid()}.tmp.npy"
+                np.save(tmp, pos)
+                os.replace(tmp, path)
+            self._pos = pos
+        return self._pos
+
+    def render(self, size=(900, 600), current=None, dpi=100):
+        # PIL image of the story graph, with the factor model beside it
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from matplotlib.collections import LineCollection
+        from matplotlib.figure import Figure
+        from PIL import Image
+
+        pos = self.layout()
+        n = len(self.node_ids)
+        fig = Figure(figsize=(size[0] / dpi, size[1] / dpi), dpi=dpi, facecolor="black")
+        FigureCanvasAgg(fig)
+        if self.model is not None:
+            ax = fig.add_axes([0.02, 0.02, 0.70, 0.90])
+            self._draw_factors(fig.add_axes([0.74, 0.02, 0.24, 0.90]))
+        else:
+            ax = fig.add_axes([0.02, 0.02, 0.96, 0.90])
+        ax.set_facecolor("black")
+        ax.axis("off")
+        fig.suptitle(f"Story graph: {n} nodes, {len(self.src)} links", color="white")
+
+        ax.add_collection(LineCollection(np.stack([pos[self.src], pos[self.tgt]], axis=1),
+                                         colors="gray", linewidths=0.5 if n > MAX_LABELS else 1.5,
+                                         alpha=0.6 if n > MAX_LABELS else 1.0))
+        out_degree = np.bincount(self.src, minlength=n)
+        colors = np.where(out_degree == 0, "gold", "steelblue").astype(object)
+        start = self.index.get(getattr(self.manager, "start", "start"))
+        if start is not None:
+            colors[start] = "green"
+        if current in self.index:
+            colors[self.index[current]] = "crimson"
+        node_size = 600 if n <= MAX_LABELS else max(2.0, 4000.0 / n)
+        ax.scatter(pos[:, 0], pos[:, 1], s=node_size, c=list(colors), edgecolors="none", zorder=2)
+        if n <= MAX_LABELS:
+            for node_id, (x, y) in zip(self.node_ids, pos):
+                ax.text(x, y, node_id, color="white", fontsize=8, ha="center", va="center", zorder=3)
+        ax.margins(0.08)
+
+        buf = io.BytesIO()
+        fig.savefig(buf, format="png", facecolor=fig.get_facecolor())
+        buf.seek(0)
+        return Image.open(buf).convert("RGB")
+
+    def _draw_factors(self, ax):
+        # Variables on top, factors (squares) below, edges by scope
+        ax.set_facecolor("black")
+        ax.axis("off")
+        ax.set_title("Factor model", color="white", fontsize=10)
+        variables = list(self.model.variables)
+        scopes = [scope for scope, _ in self.model.factors]
+        vx = {v: x for v, x in zip(variables, np.linspace(0, 1, len(variables)))}
+        fx = np.linspace(0, 1, len(scopes)) if len(scopes) > 1 else [0.5]
+        for x, scope in zip(fx, scopes):
+            for v in scope:
+                ax.plot([x, vx[v]], [0, 1], color="gray", linewidth=1)
+        ax.scatter(list(vx.values()), [1] * len(vx), s=500, c="skyblue", zorder=2)
+        ax.scatter(fx, [0] * len(scopes), s=250, c="orange", marker="s", zorder=2)
+        for k, (v, x) in enumerate(vx.items()):
+            ax.text(x, 1.08 + 0.1 * (k % 2), v, color="white", fontsize=8, ha="center")
+        ax.set_ylim(-0.3, 1.3)
+        ax.set_xlim(-0.2, 1.2)
+
+    def render_async(self, size=(900, 600), current=None):
+        # Future[PIL.Image]; poll .done() from the Tk loop
+        return self._executor.submit(self.render, size, current)
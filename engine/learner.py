@@ -0,0 +1,112 @@
+# engine/learner.py
+#
+# Fits the (energy, reputation, action) potential from logged playthroughs.
+#
+#   python -m engine.simulator --runs 1000000 --record logs/sim
+#   python -m engine.learner logs/sim/*.csv autosave.dat.journal --out data/learned_factor.json
+#
+# Inputs are read in a single streaming pass, `chunk_rows` rows at a time,
+# so logs larger than RAM are fine. Files are counted in parallel.
+#   *.csv      energy,reputation,choice[,node] rows (simulator --record output)
+#   *.journal  autosave journals (choices since the last checkpoint); stats
+#              are rebuilt by replaying the effects
+# A choice counts as an action when it contains the action name, the same
+# rule AIDecisionEngine uses to match suggestions to choices.
+#
+# The output is a factor in the data/factors.json format that
+# AIDecisionEngine.load_potential() can swap in while the game runs.
+
+import argparse
+import csv
+import json
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+import numpy as np
+
+from engine.game_state import journal_steps, read_checkpoint
+
+ACTIONS = ["rest", "sneak", "fight"]
+SCOPE = ["energy", "reputation", "action"]
+SHAPE = (3, 3, 3)
+
+
+def action_index(choice):
+    choice = choice.lower()
+    for i, action in enumerate(ACTIONS):
+        if action in choice:
+            return i
+    return -1
+
+
+def _csv_rows(path):
+    with open(path, newline='') as f:
+        for row in csv.reader(f):
+            if row and row[0] != "energy":          # skip header
+                yield int(row[0]), int(row[1]), row[2]
+
+
+def _journal_rows(path):
+    # Replay the journal on top of its checkpoint to recover the stats
+    # the player had when each choice was made.
+    save = path[:-len(".journal")]
+    for state, record in journal_steps(save, read_checkpoint(save, missing_ok=True)):
+        yield state.energy, state.reputation, record["choice"]
+
+
+def count_file(path, chunk_rows=1000000):
+    rows = _journal_rows(path) if path.endswith(".journal") else _csv_rows(path)
+    counts = np.zeros(np.prod(SHAPE), dtype=np.int64)
+    while True:
+        chunk = list(islice(rows, chunk_rows))
+        if not chunk:
+            break
+        energy, reputation, choices = zip(*chunk)
+        actions = np.fromiter((action_index(c) for c in choices), dtype=np.int64, count=len(chunk))
+        energy = np.clip(np.asarray(energy, dtype=np.int64), 0, 2)
+        reputation = np.clip(np.asarray(reputation, dtype=np.int64), 0, 2)
+        keep = actions >= 0
+        flat = (energy[keep] * 3 + reputation[keep]) * 3 + actions[keep]
+        counts += np.bincount(flat, minlength=counts.size)
+    return counts.reshape(SHAPE)
+
+
+def learn(paths, alpha=1.0, workers=None, chunk_rows=1000000):
+    # Returns (potential, counts). potential[e, r] is the smoothed
+    # P(action | e, r); add-alpha smoothing keeps unseen cells uniform.
+    counts = np.zeros(SHAPE, dtype=np.int64)
+    if workers == 1 or len(paths) <= 1:
+        for path in paths:
+            counts += count_file(path, chunk_rows)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for c in pool.map(count_file, paths, [chunk_rows] * len(paths)):
+                counts += c
+    smoothed = counts + alpha
+    return smoothed / smoothed.sum(axis=-1, keepdims=True), counts
+
+
+def save_potential(potential, path, counts=None):
+    data = {"scope": SCOPE, "table": [round(float(v), 6) for v in potential.ravel()]}
+    if counts is not None:
+        data["samples"] = int(counts.sum())
+    with open(path, 'w') as f:
+        json.dump(data, f, indent=2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Learn the AI factor potential from logs")
+    parser.add_argument("paths", nargs="+")
+    parser.add_argument("--out", default="data/learned_factor.json")
+    parser.add_argument("--alpha", type=float, default=1.0, help="add-alpha smoothing")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--chunk-rows", type=int, default=1000000)
+    args = parser.parse_args()
+
+    potential, counts = learn(args.paths, args.alpha, args.workers, args.chunk_rows)
+    save_potential(potential, args.out, counts)
+    print(f"Learned from {int(counts.sum())} choices in {len(args.paths)} files -> {args.out}")
+
+
+if __name__ == "__main__":
+    main()
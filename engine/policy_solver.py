@@ -0,0 +1,269 @@
+# engine/policy_solver.py
+#
+# Offline optimal policy for a whole story by dynamic programming.
+#
+#   python -m engine.policy_solver --rewards data/rewards.json --out data/policy.npz
+#
+# The state is (node, energy, reputation, inventory), with energy and
+# reputation clamped to a fixed range and the inventory stored as a bitset
+# over the items the story can hand out. Endings are worth
+#
+#   endings[node] (or "ending") + energy * e + reputation * r + item * #items
+#
+# and every choice adds "step" (negative = prefer short paths), discounted
+# by gamma. Values are NumPy arrays over (energy, reputation, inventory):
+#   - acyclic stories are solved bottom-up, one level at a time, so every
+#     node's value is computed exactly once (memoised backward induction);
+#   - nodes on or above a cycle are then finished by value iteration,
+#     starting from -inf so a loop is never preferred over an ending.
+# The result is a table of the best choice per state; AIDecisionEngine
+# serves suggestions from it by lookup (see AIDecisionEngine.policy_path).
+
+import argparse
+import json
+
+import numpy as np
+
+from engine.profiling import timed
+from engine.story_manager import StoryManager
+
+ENERGY_RANGE = (0, 10)
+REPUTATION_RANGE = (-5, 10)
+MAX_ITEMS = 12                  # inventory bitset has 2**items states
+CHUNK_ELEMENTS = 1 << 22        # (choice, e, r, inventory) cells per batch
+
+DEFAULT_REWARDS = {
+    "endings": {},              # node id -> reward for finishing there
+    "ending": 0.0,              # reward for endings not listed above
+    "energy": 0.0,              # per point of energy left at the end
+    "reputation": 1.0,          # per point of reputation at the end
+    "item": 0.0,                # per distinct item held at the end
+    "step": 0.0,                # per choice made
+}
+
+
+def _expand(starts, counts):
+    # Concatenated ranges [starts[i], starts[i] + counts[i]) as one array
+    total = int(counts.sum())
+    first = np.repeat(np.cumsum(counts) - counts, counts)
+    return np.repeat(starts, counts) + (np.arange(total) - first)
+
+
+def _whole(deltas, stat):
+    # The state grid is over whole stat values; fractional effects would be
+    # silently truncated, so refuse them
+    deltas = np.asarray(deltas)
+    if deltas.dtype.kind == "f" and not np.array_equal(deltas, np.round(deltas)):
+        raise ValueError(f"fractional {stat} effects are not supported by the policy solver")
+    return deltas.astype(np.int64)
+
+
+class Policy:
+    def __init__(self, node_ids, labels, items, energy_range, reputation_range, choice, value):
+        self.node_ids = list(node_ids)
+        self.labels = [tuple(l) for l in labels]
+        self.items = list(items)
+        self.energy_range = tuple(energy_range)
+        self.reputation_range = tuple(reputation_range)
+        self.choice = choice        # (node, e, r, inventory) -> choice slot, -1 at endings
+        self.value = value          # same shape, expected return
+        self.index = {node_id: i for i, node_id in enumerate(self.node_ids)}
+        self._bits = {item: 1 << k for k, item in enumerate(self.items)}
+
+    def _cell(self, node_idx, energy, reputation, inventory):
+        e0, e1 = self.energy_range
+        r0, r1 = self.reputation_range
+        bits = 0
+        for item in inventory:
+            bits |= self._bits.get(item, 0)
+        return (node_idx, max(e0, min(e1, energy)) - e0, max(r0, min(r1, reputation)) - r0, bits)
+
+    def best_choice(self, node_id, energy, reputation, inventory=()):
+        # Label of the best choice, or None at endings and unknown nodes
+        node_idx = self.index.get(node_id)
+        if node_idx is None:
+            return None
+        k = int(self.choice[self._cell(node_idx, energy, reputation, inventory)])
+        return self.labels[node_idx][k] if k >= 0 else None
+
+    def expected_value(self, node_id, energy, reputation, inventory=()):
+        return float(self.value[self._cell(self.index[node_id], energy, reputation, inventory)])
+
+    def suggest(self, state, node_id):
+        return self.best_choice(node_id, state.energy, state.reputation, state.inventory)
+
+    def save(self, path):
+        meta = {"node_ids": self.node_ids, "labels": self.labels, "items": self.items,
+                "energy_range": self.energy_range, "reputation_range": self.reputation_range}
+        with open(path, 'wb') as f:
+            np.savez_compressed(f, choice=self.choice, value=self.value, meta=np.array(json.dumps(meta)))
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            meta = json.loads(str(data["meta"]))
+            return cls(meta["node_ids"], meta["labels"], meta["items"], meta["energy_range"],
+                       meta["reputation_range"], data["choice"], data["value"])
+
+
+class PolicySolver:
+    def __init__(self, manager, rewards=None, gamma=1.0,
+                 energy_range=ENERGY_RANGE, reputation_range=REPUTATION_RANGE, max_items=MAX_ITEMS):
+        if manager.dangling:
+            manager.validate()      # raises with the list of broken links
+        self.manager = manager
+        self.rewards = {**DEFAULT_REWARDS, **(rewards or {})}
+        self.gamma = gamma
+        self.energy_range = energy_range
+        self.reputation_range = reputation_range
+
+        self.offsets = np.asarray(manager.choice_offsets, dtype=np.int64)
+        self.targets = np.asarray(manager.choice_targets, dtype=np.int64)
+        self.counts = np.diff(self.offsets)
+        self.delta_energy = _whole(manager.choice_energy, "energy")
+        self.delta_reputation = _whole(manager.choice_reputation, "reputation")
+        self.items = sorted({item for items in manager.choice_items for item in items})
+        if len(self.items) > max_items:
+            raise ValueError(f"{len(self.items)} distinct items is too many for the inventory "
+                             f"bitset (max_items={max_items})")
+        bits = {item: 1 << k for k, item in enumerate(self.items)}
+        self.item_masks = np.array([sum(bits[i] for i in set(items)) for items in manager.choice_items],
+                                   dtype=np.int64)
+
+        self.energies = np.arange(energy_range[0], energy_range[1] + 1)
+        self.reputations = np.arange(reputation_range[0], reputation_range[1] + 1)
+        self.inventories = np.arange(1 << len(self.items))
+        self.shape = (len(self.energies), len(self.reputations), len(self.inventories))
+
+    # ------------------------
+    # Rewards
+    # ------------------------
+    def _ending_values(self, nodes):
+        r = self.rewards
+        base = np.array([r["endings"].get(self.manager.node_ids[i], r["ending"]) for i in nodes])
+        held = np.array([bin(b).count("1") for b in self.inventories])
+        stats = (r["energy"] * self.energies[:, None, None]
+                 + r["reputation"] * self.reputations[None, :, None]
+                 + r["item"] * held[None, None, :])
+        return base[:, None, None, None] + stats
+
+    # ------------------------
+    # Bellman backup
+    # ------------------------
+    def _backup(self, value, nodes):
+        # Best (value, choice) for each node in `nodes` (all with choices).
+        # Nodes are taken in groups of about CHUNK_ELEMENTS cells of choices
+        # so the per-choice temporaries stay bounded for any story size.
+        nodes = np.asarray(nodes)
+        best = np.empty((len(nodes),) + self.shape, dtype=value.dtype)
+        best_choice = np.empty((len(nodes),) + self.shape, dtype=np.int32)
+        step = max(1, CHUNK_ELEMENTS // int(np.prod(self.shape)))
+        ends = np.cumsum(self.counts[nodes])
+        lo = 0
+        while lo < len(nodes):
+            hi = max(lo + 1, int(np.searchsorted(ends, ends[lo] - self.counts[nodes[lo]] + step, "right")))
+            best[lo:hi], best_choice[lo:hi] = self._backup_group(value, nodes[lo:hi])
+            lo = hi
+        return best, best_choice
+
+    def _backup_group(self, value, nodes):
+        counts = self.counts[nodes]
+        c = _expand(self.offsets[nodes], counts)
+        starts = np.cumsum(counts) - counts
+        local = np.arange(len(c)) - np.repeat(starts, counts)
+
+        e0, r0 = self.energy_range[0], self.reputation_range[0]
+        e = np.clip(self.energies[None, :] + self.delta_energy[c, None], *self.energy_range) - e0
+        r = np.clip(self.reputations[None, :] + self.delta_reputation[c, None], *self.reputation_range) - r0
+        b = self.inventories[None, :] | self.item_masks[c, None]
+        q = self.rewards["step"] + self.gamma * value[
+            self.targets[c, None, None, None], e[:, :, None, None], r[:, None, :, None], b[:, None, None, :]]
+
+        best = np.maximum.reduceat(q, starts, axis=0)
+        first = np.where(q >= np.repeat(best, counts, axis=0), local[:, None, None, None], np.iinfo(np.int32).max)
+        return best, np.minimum.reduceat(first, starts, axis=0)
+
+    def _levels(self):
+        # Nodes grouped so every choice of a level leads to an earlier level.
+        # Nodes on or leading into a cycle are left out.
+        n = len(self.counts)
+        src = np.repeat(np.arange(n), self.counts)
+        order = np.argsort(self.targets, kind="stable")
+        rev_src = src[order]
+        rev_off = np.searchsorted(self.targets[order], np.arange(n + 1))
+
+        remaining = self.counts.copy()
+        frontier = np.flatnonzero(remaining == 0)
+        levels = []
+        while len(frontier):
+            preds = rev_src[_expand(rev_off[frontier], rev_off[frontier + 1] - rev_off[frontier])]
+            np.subtract.at(remaining, preds, 1)
+            frontier = np.unique(preds[remaining[preds] == 0])
+            if len(frontier):
+                levels.append(frontier)
+        return levels, np.flatnonzero(remaining > 0)
+
+    @timed("policy.solve")
+    def solve(self, tol=1e-6, max_iters=1000):
+        n = len(self.counts)
+        value = np.zeros((n,) + self.shape, dtype=np.float32)
+        choice = np.full((n,) + self.shape, -1, dtype=np.int8 if self.counts.max(initial=0) < 128 else np.int32)
+
+        endings = np.flatnonzero(self.counts == 0)
+        value[endings] = self._ending_values(endings)
+
+        levels, cyclic = self._levels()
+        for nodes in levels:
+            value[nodes], choice[nodes] = self._backup(value, nodes)
+
+        # Value iteration from below: cyclic values start at -inf, so a loop
+        # is only worth what it eventually leads to (with gamma=1 a free loop
+        # would otherwise be worth 0 and beat every negative ending). A
+        # choice only changes on a strict improvement, so ties keep the
+        # choice that first reached an ending instead of looping. States
+        # that can never reach an ending stay at -inf with choice -1.
+        self.iterations = 0
+        self.converged = True
+        if len(cyclic):
+            self.converged = False
+            value[cyclic] = -np.inf
+            for self.iterations in range(1, max_iters + 1):
+                old = value[cyclic]
+                best, best_choice = self._backup(value, cyclic)
+                improved = best > old
+                choice[cyclic] = np.where(improved, best_choice, choice[cyclic])
+                delta = float((best[improved] - old[improved]).max(initial=0.0))
+                value[cyclic] = np.maximum(best, old)
+                if delta < tol:
+                    self.converged = True
+                    break
+
+        return Policy(self.manager.node_ids, self.manager.node_labels, self.items,
+                      self.energy_range, self.reputation_range, choice, value)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Solve the optimal story policy offline")
+    parser.add_argument("--story", default="data/story.json")
+    parser.add_argument("--rewards", default=None, help="JSON with endings/ending/energy/reputation/item/step")
+    parser.add_argument("--gamma", type=float, default=1.0)
+    parser.add_argument("--energy", type=int, nargs=2, default=ENERGY_RANGE, metavar=("MIN", "MAX"))
+    parser.add_argument("--reputation", type=int, nargs=2, default=REPUTATION_RANGE, metavar=("MIN", "MAX"))
+    parser.add_argument("--out", default="data/policy.npz")
+    args = parser.parse_args()
+
+    rewards = None
+    if args.rewards:
+        with open(args.rewards) as f:
+            rewards = json.load(f)
+    solver = PolicySolver(StoryManager(args.story), rewards, args.gamma,
+                          tuple(args.energy), tuple(args.reputation))
+    policy = solver.solve()
+    policy.save(args.out)
+    status = "converged" if solver.converged else "NOT converged"
+    print(f"Solved {len(policy.node_ids)} nodes x {np.prod(solver.shape)} states "
+          f"({solver.iterations} value iterations, {status}) -> {args.out}")
+
+
+if __name__ == "__main__":
+    main()
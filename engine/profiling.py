@@ -0,0 +1,204 @@
+# engine/profiling.py
+#
+# Opt-in timing of the game's hot paths.
+#
+#   ADVENTURE_PROFILE=1 python main.py                 # writes logs/profile.json on exit
+#   ADVENTURE_PROFILE=1 ADVENTURE_PROFILE_SAMPLE=50 ... # + cProfile every 50th call
+#
+# Timings go into log-scale histograms (p50/p95/p99 without keeping every
+# sample). Calls that run under a cProfile sample (the sampled call and
+# everything it times) are slowed by the profiler, so they are recorded
+# as "<name>.profiled" instead of inflating the tail of "<name>". When profiling is off, @timed costs one flag check per call and
+# span() returns a shared no-op context manager.
+
+import cProfile
+import csv
+import functools
+import json
+import math
+import os
+import pstats
+import threading
+import time
+from contextlib import contextmanager
+
+BUCKETS_PER_DECADE = 20
+MIN_SECONDS = 1e-7
+
+_enabled = os.environ.get("ADVENTURE_PROFILE", "") not in ("", "0")
+_sample_every = int(os.environ.get("ADVENTURE_PROFILE_SAMPLE", "0") or 0)
+_histograms = {}
+_profiles = {}
+_profiling = [False]     # only one cProfile can run at a time
+_lock = threading.Lock()
+
+
+class Histogram:
+    def __init__(self):
+        self.buckets = {}       # bucket index -> count
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds):
+        b = int(math.log10(max(seconds, MIN_SECONDS) / MIN_SECONDS) * BUCKETS_PER_DECADE)
+        self.buckets[b] = self.buckets.get(b, 0) + 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def percentile(self, q):
+        # Upper edge of the bucket holding the q-th percentile sample
+        if not self.count:
+            return 0.0
+        rank, seen = q / 100 * self.count, 0
+        for b in sorted(self.buckets):
+            seen += self.buckets[b]
+            if seen >= rank:
+                return min(self.max, MIN_SECONDS * 10 ** ((b + 1) / BUCKETS_PER_DECADE))
+        return self.max
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "mean_ms": 1000 * self.total / self.count if self.count else 0.0,
+            "p50_ms": 1000 * self.percentile(50),
+            "p95_ms": 1000 * self.percentile(95),
+            "p99_ms": 1000 * self.percentile(99),
+            "max_ms": 1000 * self.max,
+        }
+
+
+# ------------------------
+# Control
+# ------------------------
+def enable(sample_every=0):
+    global _enabled, _sample_every
+    _enabled, _sample_every = True, sample_every
+
+
+def disable():
+    global _enabled
+    _enabled = False
+
+
+def enabled():
+    return _enabled
+
+
+def reset():
+    with _lock:
+        _histograms.clear()
+        _profiles.clear()
+
+
+# ------------------------
+# Recording
+# ------------------------
+def record(name, seconds):
+    with _lock:
+        hist = _histograms.get(name)
+        if hist is None:
+            hist = _histograms[name] = Histogram()
+        hist.add(seconds)
+        return hist.count
+
+
+def _series(name):
+    # cProfile only slows the thread it runs on (always the main thread)
+    if _profiling[0] and threading.current_thread() is threading.main_thread():
+        return name + ".profiled"
+    return name
+
+
+def _profile_call(name, func, args, kwargs):
+    profiler = cProfile.Profile()
+    _profiling[0] = True
+    t0 = time.perf_counter()
+    try:
+        return profiler.runcall(func, *args, **kwargs)
+    finally:
+        record(_series(name), time.perf_counter() - t0)
+        _profiling[0] = False
+        with _lock:
+            if name in _profiles:
+                _profiles[name].add(profiler)
+            else:
+                _profiles[name] = pstats.Stats(profiler)
+
+
+def timed(name):
+    def decorator(func):
+        calls = [0]
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            calls[0] += 1
+            if _sample_every and calls[0] % _sample_every == 0 and not _profiling[0] \
+                    and threading.current_thread() is threading.main_thread():
+                return _profile_call(name, func, args, kwargs)
+            t0 = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record(_series(name), time.perf_counter() - t0)
+        return wrapper
+    return decorator
+
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+@contextmanager
+def _span(name):
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(_series(name), time.perf_counter() - t0)
+
+
+def span(name):
+    # with span("image.decode"): ...
+    return _span(name) if _enabled else _NULL_SPAN
+
+
+# ------------------------
+# Reporting
+# ------------------------
+def summary():
+    with _lock:
+        return {name: hist.summary() for name, hist in sorted(_histograms.items())}
+
+
+def export(path):
+    # JSON or CSV depending on the extension; cProfile samples go next to it
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    stats = summary()
+    if path.endswith(".csv"):
+        fields = ["name", "count", "mean_ms", "p50_ms", "p95_ms", "p99_ms", "max_ms"]
+        with open(path, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=fields)
+            writer.writeheader()
+            for name, row in stats.items():
+                writer.writerow({"name": name, **row})
+    else:
+        with open(path, 'w') as f:
+            json.dump(stats, f, indent=2)
+
+    with _lock:
+        profiles = dict(_profiles)
+    base = os.path.splitext(path)[0]
+    for name, prof in profiles.items():
+        prof.dump_stats(f"{base}.{name}.prof")
+    return stats
@@ -0,0 +1,191 @@
+# engine/replay.py
+#
+# Headless batch replay of recorded sessions, to check that engine changes
+# do not change outcomes and to profile real workloads offline.
+#
+#   python -m engine.replay logs/sessions.jsonl autosave.dat.journal --workers 8
+#   python -m engine.replay logs/factor_sessions.jsonl
+#   python -m engine.replay logs/sessions.jsonl --profile logs/replay.json
+#
+# Inputs:
+#   *.jsonl    one record per line, as written by GameSession.to_record()
+#              (python -m engine.server --record) or FactorGame.to_record()
+#              (FinalGame/FinalProjectMain.py):
+#                {"kind": "story", "seed", "start", "state", "choices", "final"}
+#                {"kind": "factor", "seed", "actions", "final"}
+#   *.journal  autosave journals; the checkpoint is the starting point and
+#              the expected final state is rebuilt from the recorded effects
+# Every record is re-executed from its seed and the final state compared
+# with the recorded one. Exits with status 1 if any session differs.
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from engine import profiling
+from engine.game_state import GameState, journal_steps, read_checkpoint
+from engine.profiling import timed
+from engine.story_manager import StoryManager
+
+CHUNK_SIZE = 5000
+MAX_REPORTED = 20       # mismatches kept with details
+
+
+# ------------------------
+# Inputs
+# ------------------------
+def journal_record(path):
+    # A autosave.dat.journal as a story record
+    save = path[:-len(".journal")]
+    checkpoint = read_checkpoint(save, missing_ok=True)
+    node = checkpoint["node"]
+    record = {"kind": "story", "seed": checkpoint["seed"], "start": node,
+              "state": checkpoint["state"].to_dict(), "choices": [], "source": path}
+    for _, entry in journal_steps(save, checkpoint):
+        record["choices"].append(entry["choice"])
+        node = entry["next"]
+    record["final"] = {"node": node, "state": checkpoint["state"].to_dict()}
+    return record
+
+
+def read_records(paths):
+    for path in paths:
+        if path.endswith(".journal"):
+            yield journal_record(path)
+            continue
+        with open(path, encoding='utf-8') as f:
+            for n, line in enumerate(f, 1):
+                if line.strip():
+                    record = json.loads(line)
+                    record.setdefault("source", f"{path}:{n}")
+                    yield record
+
+
+# ------------------------
+# Replay
+# ------------------------
+@timed("replay.story")
+def replay_story(manager, record):
+    state = GameState.from_dict(record.get("state", {}))
+    node = manager.index[record.get("start", manager.start)]
+    for choice in record["choices"]:
+        node = manager.step(node, manager._slots[node][choice], state)
+    return {"node": manager.node_ids[node], "state": state.to_dict()}
+
+
+@timed("replay.factor")
+def replay_factor(record):
+    from FinalGame.factor_core import FactorGame
+    game = FactorGame(record["seed"])
+    for action in record["actions"]:
+        game.take_action(action)
+    return game.snapshot()
+
+
+def check(manager, record):
+    # None if the replay matches, else a short description of the difference
+    try:
+        if record.get("kind", "story") == "factor":
+            final = replay_factor(record)
+        else:
+            final = replay_story(manager, record)
+    except (KeyError, IndexError) as e:
+        return f"replay failed: {e!r}"
+    expected = record.get("final")
+    if expected is None or final == expected:
+        return None
+    diff = {k: (expected.get(k), final.get(k)) for k in set(expected) | set(final)
+            if expected.get(k) != final.get(k)}
+    return f"expected -> got: {diff}"
+
+
+def _replay_chunk(story_path, records):
+    manager = StoryManager(story_path, strict=False)
+    steps, mismatches = 0, []
+    for record in records:
+        steps += len(record.get("choices") or record.get("actions") or ())
+        problem = check(manager, record)
+        if problem is not None:
+            mismatches.append((record.get("source", "?"), record.get("seed"), problem))
+    return len(records), steps, mismatches
+
+
+class ReplayResult:
+    def __init__(self, sessions, steps, mismatches, mismatch_count, elapsed):
+        self.sessions = sessions
+        self.steps = steps
+        self.mismatches = mismatches            # first MAX_REPORTED (source, seed, problem)
+        self.mismatch_count = mismatch_count
+        self.elapsed = elapsed
+
+    def summary(self):
+        rate = self.sessions / self.elapsed if self.elapsed else 0.0
+        lines = [f"{self.sessions} sessions ({self.steps} steps) replayed in {self.elapsed:.2f}s "
+                 f"({rate:,.0f}/sec)",
+                 f"{self.mismatch_count} mismatched"]
+        for source, seed, problem in self.mismatches:
+            lines.append(f"  {source} (seed {seed}): {problem}")
+        if self.mismatch_count > len(self.mismatches):
+            lines.append(f"  ... and {self.mismatch_count - len(self.mismatches)} more")
+        return "\n".join(lines)
+
+
+def replay(paths, story_path="data/story.json", workers=None, chunk_size=CHUNK_SIZE):
+    records = read_records(paths)
+    chunks = iter(lambda: list(islice(records, chunk_size)), [])
+    sessions = steps = mismatch_count = 0
+    mismatches = []
+
+    def collect(result):
+        nonlocal sessions, steps, mismatch_count
+        n, s, bad = result
+        sessions += n
+        steps += s
+        mismatch_count += len(bad)
+        mismatches.extend(bad[:MAX_REPORTED - len(mismatches)])
+
+    t0 = time.perf_counter()
+    if workers == 1:
+        for chunk in chunks:
+            collect(_replay_chunk(story_path, chunk))
+    else:
+        # Keep a bounded number of chunks in flight so huge logs stream
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            limit = 2 * (workers or os.cpu_count() or 1)
+            pending = []
+            for chunk in chunks:
+                pending.append(pool.submit(_replay_chunk, story_path, chunk))
+                if len(pending) >= limit:
+                    collect(pending.pop(0).result())
+            for future in pending:
+                collect(future.result())
+    return ReplayResult(sessions, steps, mismatches, mismatch_count, time.perf_counter() - t0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded sessions and check final states")
+    parser.add_argument("paths", nargs="+", help="*.jsonl session logs and/or *.journal files")
+    parser.add_argument("--story", default="data/story.json")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--profile", default=None,
+                        help="write timings here (implies --workers 1 and profiling on)")
+    args = parser.parse_args()
+
+    workers = args.workers
+    if args.profile:
+        profiling.enable(int(os.environ.get("ADVENTURE_PROFILE_SAMPLE", "0") or 0))
+        workers = 1
+    result = replay(args.paths, args.story, workers, args.chunk_size)
+    print(result.summary())
+    if args.profile:
+        profiling.export(args.profile)
+    sys.exit(1 if result.mismatch_count else 0)
+
+
+if __name__ == "__main__":
+    main()
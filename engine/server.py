@@ -0,0 +1,219 @@
+# engine/server.py
+#
+# Asyncio server hosting many headless GameSessions in one process.
+#
+#   python -m engine.server --port 8765
+#   python -m engine.server --unix /tmp/adventure.sock
+#   python -m engine.server --bench --clients 1000 --games 5
+#
+# Protocol: one JSON object per line in each direction.
+#   {"op": "new", "name": "Ann", "seed": 7}            -> {"ok": true, "session": "1", ...view}
+#   {"op": "view", "session": "1"}                     -> {"ok": true, ...view}
+#   {"op": "choose", "session": "1", "choice": "left"} -> {"ok": true, ...view}
+#   {"op": "close", "session": "1"}                    -> {"ok": true}
+#   {"op": "stats"}                                    -> {"ok": true, "sessions": ..., "p99_ms": ...}
+# Errors come back as {"ok": false, "error": "..."}.
+# With --record, every closed or evicted session is appended to a JSON
+# lines file that python -m engine.replay can re-run.
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import time
+from collections import deque
+
+from engine.factor_graph_ai import AIDecisionEngine
+from engine.session import GameSession
+from engine.story_manager import load_story
+
+
+def percentile(values, q):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q / 100 * len(ordered)))]
+
+
+class GameServer:
+    def __init__(self, story_path="data/story.json", idle_timeout=600, latency_window=100000,
+                 model_path="data/factors.json", record_path=None):
+        # Shared by every session
+        self.story_manager = load_story(story_path)
+        self.ai = AIDecisionEngine(model_path=model_path)
+
+        self.sessions = {}          # id -> GameSession
+        self.last_active = {}       # id -> monotonic time
+        self.idle_timeout = idle_timeout
+        self.latencies = deque(maxlen=latency_window)   # seconds per "choose"
+        self.evicted = 0
+        self._ids = itertools.count(1)
+        self._records = None
+        if record_path:
+            os.makedirs(os.path.dirname(record_path) or ".", exist_ok=True)
+            self._records = open(record_path, 'a', buffering=1)     # line buffered
+
+    # ------------------------
+    # Requests
+    # ------------------------
+    def handle(self, request):
+        op = request.get("op")
+        if op == "new":
+            sid = str(next(self._ids))
+            self.sessions[sid] = GameSession(self.story_manager, self.ai, request.get("name"),
+                                             seed=request.get("seed"))
+            self.last_active[sid] = time.monotonic()
+            return {"ok": True, "session": sid, **self.sessions[sid].view()}
+        if op == "stats":
+            return {"ok": True, **self.stats()}
+
+        sid = request.get("session")
+        session = self.sessions.get(sid)
+        if session is None:
+            return {"ok": False, "error": f"unknown session {sid!r}"}
+        self.last_active[sid] = time.monotonic()
+
+        if op == "view":
+            return {"ok": True, **session.view()}
+        if op == "choose":
+            t0 = time.perf_counter()
+            view = session.choose(request.get("choice"))
+            self.latencies.append(time.perf_counter() - t0)
+            return {"ok": True, **view}
+        if op == "close":
+            self._drop(sid)
+            return {"ok": True}
+        return {"ok": False, "error": f"unknown op {op!r}"}
+
+    def stats(self):
+        latencies = list(self.latencies)
+        return {
+            "sessions": len(self.sessions),
+            "evicted": self.evicted,
+            "choices": len(latencies),
+            "p50_ms": 1000 * percentile(latencies, 50),
+            "p99_ms": 1000 * percentile(latencies, 99),
+        }
+
+    def _drop(self, sid):
+        session = self.sessions.pop(sid, None)
+        self.last_active.pop(sid, None)
+        if session is not None and self._records is not None:
+            self._records.write(json.dumps(session.to_record()) + "\n")
+
+    def evict_idle(self):
+        cutoff = time.monotonic() - self.idle_timeout
+        stale = [sid for sid, t in self.last_active.items() if t < cutoff]
+        for sid in stale:
+            self._drop(sid)
+        self.evicted += len(stale)
+        return len(stale)
+
+    # ------------------------
+    # Networking
+    # ------------------------
+    async def _client(self, reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    response = self.handle(json.loads(line))
+                except Exception as e:      # bad JSON, bad choice, ...
+                    response = {"ok": False, "error": str(e)}
+                writer.write(json.dumps(response).encode() + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _evict_loop(self):
+        while True:
+            await asyncio.sleep(max(1.0, self.idle_timeout / 4))
+            self.evict_idle()
+
+    async def start(self, host="127.0.0.1", port=8765, unix_path=None):
+        if unix_path:
+            server = await asyncio.start_unix_server(self._client, unix_path, limit=2 ** 20)
+        else:
+            server = await asyncio.start_server(self._client, host, port, limit=2 ** 20)
+        self._evictor = asyncio.create_task(self._evict_loop())
+        return server
+
+
+# ------------------------
+# Load generator
+# ------------------------
+async def _play(host, port, games, seed, latencies):
+    rng = random.Random(seed)
+    reader, writer = await asyncio.open_connection(host, port)
+
+    async def call(**request):
+        t0 = time.perf_counter()
+        writer.write(json.dumps(request).encode() + b"\n")
+        await writer.drain()
+        response = json.loads(await reader.readline())
+        return response, time.perf_counter() - t0
+
+    for _ in range(games):
+        view, _ = await call(op="new", name=f"bot{seed}")
+        sid = view["session"]
+        while not view["ended"]:
+            view, dt = await call(op="choose", session=sid, choice=rng.choice(view["choices"]))
+            latencies.append(dt)
+        await call(op="close", session=sid)
+    writer.close()
+
+
+async def bench(story_path, clients, games, port):
+    game_server = GameServer(story_path)
+    server = await game_server.start(port=port)
+    latencies = []
+    t0 = time.perf_counter()
+    await asyncio.gather(*(_play("127.0.0.1", port, games, i, latencies) for i in range(clients)))
+    elapsed = time.perf_counter() - t0
+    server.close()
+
+    sessions = clients * games
+    print(f"{clients} concurrent clients, {sessions} sessions, {len(latencies)} choices "
+          f"in {elapsed:.2f}s (1 core)")
+    print(f"  sessions/sec/core: {sessions / elapsed:,.0f}")
+    print(f"  client choice latency p50 {1000 * percentile(latencies, 50):.2f} ms, "
+          f"p99 {1000 * percentile(latencies, 99):.2f} ms")
+    stats = game_server.stats()
+    print(f"  server choice latency p50 {stats['p50_ms']:.3f} ms, p99 {stats['p99_ms']:.3f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless multi-session game server")
+    parser.add_argument("--story", default="data/story.json")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", default=None, help="listen on a Unix socket instead")
+    parser.add_argument("--idle-timeout", type=float, default=600)
+    parser.add_argument("--record", default=None, help="append finished sessions to this JSONL file")
+    parser.add_argument("--bench", action="store_true", help="run a local load test and exit")
+    parser.add_argument("--clients", type=int, default=100)
+    parser.add_argument("--games", type=int, default=10)
+    args = parser.parse_args()
+
+    if args.bench:
+        asyncio.run(bench(args.story, args.clients, args.games, args.port))
+        return
+
+    async def serve():
+        game_server = GameServer(args.story, args.idle_timeout, record_path=args.record)
+        server = await game_server.start(args.host, args.port, args.unix)
+        print(f"Serving on {args.unix or f'{args.host}:{args.port}'}")
+        async with server:
+            await server.serve_forever()
+
+    asyncio.run(serve())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+# engine/session.py
+#
+# Headless game session: one player's GameState and position in the story,
+# with no Tk. The story and AI engine are passed in so many sessions can
+# share one compiled copy of each.
+
+import random
+
+from engine.game_state import GameState
+
+
+class GameSession:
+    def __init__(self, story_manager, ai, name="Player", start="start", seed=None):
+        self.story_manager = story_manager
+        self.story = story_manager.story
+        self.ai = ai
+        self.state = GameState()
+        self.state.name = name or "Player"
+        self.start = self.current_node = start
+        self.initial = self.state.to_dict()
+        self.choices = []       # every choice made, for replay
+        self.visited = {start}  # node ids seen, "visited:<node>" evidence for the AI
+
+        # All randomness in the session (AI tie-breaks) comes from here
+        self.seed = random.randrange(2 ** 32) if seed is None else seed
+        self.rng = random.Random(self.seed)
+
+    @property
+    def ended(self):
+        return not self.story[self.current_node].get("choices")
+
+    def view(self):
+        node = self.story[self.current_node]
+        choices = node.get("choices", {})
+        suggestion = None
+        if choices:
+            suggestion = self.ai.suggest_for(self.state, self.current_node, choices, self.visited,
+                                             rng=self.rng)
+        return {
+            "node": self.current_node,
+            "text": node["text"],
+            "image": node.get("image"),
+            "choices": list(choices),
+            "suggestion": suggestion,
+            "state": self.state.to_dict(),
+            "ended": not choices,
+        }
+
+    def choose(self, choice):
+        if choice not in self.story[self.current_node].get("choices", {}):
+            raise KeyError(f"'{choice}' is not a choice at '{self.current_node}'")
+        self.current_node = self.story_manager.make_choice(self.current_node, choice, self.state)
+        self.choices.append(choice)
+        self.visited.add(self.current_node)
+        return self.view()
+
+    def to_record(self):
+        # Replayable summary (python -m engine.replay)
+        return {"kind": "story", "seed": self.seed, "start": self.start, "state": self.initial,
+                "choices": list(self.choices),
+                "final": {"node": self.current_node, "state": self.state.to_dict()}}
@@ -0,0 +1,205 @@
+# engine/simulator.py
+#
+# Headless Monte Carlo playthroughs of story.json.
+#
+#   python -m engine.simulator --runs 1000000 --policy random --workers 8
+
+import argparse
+import csv
+import os
+import random
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+from engine.game_state import GameState
+from engine.story_manager import StoryManager
+
+CHUNK_SIZE = 20000
+
+
+# ------------------------
+# Policies
+# ------------------------
+# A policy is called as policy(state, node_id, choices, rng) and returns
+# one of the choice labels in `choices`. Custom policies must be top-level
+# functions so they can be sent to worker processes.
+
+def random_policy(state, node_id, choices, rng):
+    return rng.choice(list(choices))
+
+
+def fixed_policy(state, node_id, choices, rng):
+    # Always take the first listed choice
+    return next(iter(choices))
+
+
+class AIPolicy:
+    def __init__(self):
+        from engine.factor_graph_ai import AIDecisionEngine
+        self.engine = AIDecisionEngine()
+
+    def __call__(self, state, node_id, choices, rng):
+        return self.engine.suggest(state.energy, state.reputation, choices, rng)
+
+
+class OptimalPolicy:
+    # Solved whole-story policy (python -m engine.policy_solver)
+    def __init__(self, path="data/policy.npz"):
+        from engine.policy_solver import Policy
+        self.policy = Policy.load(path)
+
+    def __call__(self, state, node_id, choices, rng):
+        best = self.policy.suggest(state, node_id)
+        return best if best in choices else rng.choice(list(choices))
+
+
+POLICIES = {
+    "random": random_policy,
+    "fixed": fixed_policy,
+    "ai": AIPolicy,
+    "optimal": OptimalPolicy,
+}
+
+
+def make_policy(policy):
+    if callable(policy) and not isinstance(policy, type):
+        return policy
+    if isinstance(policy, type):
+        return policy()
+    factory = POLICIES[policy]
+    return factory() if isinstance(factory, type) else factory
+
+
+# ------------------------
+# Simulation
+# ------------------------
+def play_once(manager, policy, rng, start="start", max_steps=1000, record=None):
+    # Walks the compiled story by node index; the path is returned as indices.
+    # With `record`, (energy, reputation, choice, node) is appended per step.
+    state = GameState()
+    node = manager.index[start]
+    path = [node]
+
+    for _ in range(max_steps):
+        labels = manager.node_labels[node]
+        if not labels:
+            break
+        choice = policy(state, manager.node_ids[node], labels, rng)
+        if record is not None:
+            record.append((state.energy, state.reputation, choice, manager.node_ids[node]))
+        node = manager.step(node, labels.index(choice), state)
+        path.append(node)
+
+    return state, manager.node_ids[node], tuple(path)
+
+
+def _run_chunk(story_path, policy, runs, seed, chunk_index, start, max_steps, record_dir=None):
+    manager = StoryManager(story_path, start=start)
+    policy = make_policy(policy)
+
+    # One RNG per chunk, so results depend only on the seed, not on
+    # how chunks happen to be spread across workers.
+    rng = random.Random(seed * 1000003 + chunk_index)
+
+    # Per-choice rows for engine/learner.py, one CSV per chunk
+    record, writer = None, None
+    if record_dir:
+        os.makedirs(record_dir, exist_ok=True)
+        out = open(os.path.join(record_dir, f"chunk-{chunk_index:05d}.csv"), 'w', newline='')
+        writer = csv.writer(out)
+        writer.writerow(["energy", "reputation", "choice", "node"])
+        record = []
+
+    endings, paths = Counter(), Counter()
+    energy, reputation = Counter(), Counter()
+    for _ in range(runs):
+        state, end, path = play_once(manager, policy, rng, start, max_steps, record)
+        if record:
+            writer.writerows(record)
+            record.clear()
+        endings[end] += 1
+        paths[path] += 1
+        energy[state.energy] += 1
+        reputation[state.reputation] += 1
+
+    if writer is not None:
+        out.close()
+
+    names = manager.node_ids
+    paths = Counter({tuple(names[i] for i in path): n for path, n in paths.items()})
+    return endings, paths, energy, reputation
+
+
+class SimulationResult:
+    def __init__(self, runs, seconds):
+        self.runs = runs
+        self.seconds = seconds
+        self.endings = Counter()
+        self.paths = Counter()
+        self.energy = Counter()
+        self.reputation = Counter()
+
+    @property
+    def playthroughs_per_sec(self):
+        return self.runs / self.seconds if self.seconds else float("inf")
+
+    def summary(self, top_paths=10):
+        lines = [f"{self.runs} playthroughs in {self.seconds:.2f}s "
+                 f"({self.playthroughs_per_sec:,.0f}/sec)", "", "Endings:"]
+        for end, n in self.endings.most_common():
+            lines.append(f"  {end:<20} {n:>10}  {n / self.runs:6.1%}")
+        lines += ["", f"Top {top_paths} paths:"]
+        for path, n in self.paths.most_common(top_paths):
+            lines.append(f"  {n:>10}  {' -> '.join(path)}")
+        for name, hist in (("energy", self.energy), ("reputation", self.reputation)):
+            lines += ["", f"Final {name}:"]
+            for value in sorted(hist):
+                lines.append(f"  {value:>4} {hist[value]:>10}")
+        return "\n".join(lines)
+
+
+def simulate(runs, policy="random", story_path="data/story.json", workers=None,
+             seed=0, start="start", max_steps=1000, chunk_size=CHUNK_SIZE, record_dir=None):
+    workers = workers or os.cpu_count() or 1
+    chunks = [min(chunk_size, runs - i) for i in range(0, runs, chunk_size)]
+
+    t0 = time.perf_counter()
+    if workers == 1:
+        parts = [_run_chunk(story_path, policy, n, seed, i, start, max_steps, record_dir)
+                 for i, n in enumerate(chunks)]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_run_chunk, story_path, policy, n, seed, i, start,
+                                   max_steps, record_dir)
+                       for i, n in enumerate(chunks)]
+            parts = [f.result() for f in futures]
+
+    result = SimulationResult(runs, time.perf_counter() - t0)
+    for endings, paths, energy, reputation in parts:
+        result.endings.update(endings)
+        result.paths.update(paths)
+        result.energy.update(energy)
+        result.reputation.update(reputation)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless story playthrough simulator")
+    parser.add_argument("--story", default="data/story.json")
+    parser.add_argument("--runs", type=int, default=100000)
+    parser.add_argument("--policy", choices=sorted(POLICIES), default="random")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-steps", type=int, default=1000)
+    parser.add_argument("--record", default=None,
+                        help="directory for per-choice CSV logs (input for engine.learner)")
+    args = parser.parse_args()
+
+    result = simulate(args.runs, args.policy, args.story, args.workers,
+                      args.seed, max_steps=args.max_steps, record_dir=args.record)
+    print(result.summary())
+
+
+if __name__ == "__main__":
+    main()
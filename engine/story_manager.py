@@ -1,8 +1,336 @@
 # engine/story_manager.py
 import json
+import os
+import re
+import threading
+from array import array
+from collections import deque
+from json.decoder import scanstring
+
+from engine.profiling import timed
+
+
+def load_story(path="data/story.json", **kwargs):
+    # Story packs (see engine/story_pack.py) are memory-mapped and decoded
+    # lazily; plain JSON is compiled up front.
+    from engine.story_pack import is_story_pack, MappedStoryManager
+    if is_story_pack(path):
+        return MappedStoryManager(path, **kwargs)
+    return StoryManager(path, **kwargs)
+
+
+def _stat_array(values):
+    # Effects are whole numbers in practice, kept as C ints so GameState
+    # stats stay ints; a story with fractional (or huge) effects gets
+    # doubles instead of failing to load
+    try:
+        return array('i', values)
+    except (TypeError, OverflowError):
+        return array('d', values)
+
+
+def _set_stat(values, c, value):
+    # values[c] = value, widening an int array to doubles if needed
+    try:
+        values[c] = value
+    except (TypeError, OverflowError):
+        values = array('d', values)
+        values[c] = value
+    return values
 
 
 class StoryManager:
-    def __init__(self, path="data/story.json"):
+    @timed("story.load")
+    def __init__(self, path="data/story.json", start="start", strict=True):
+        self.path = path
+        self.start = start
+        self.strict = strict
+        self._stat = _file_stat(path)
         with open(path) as f:
             self.story = json.load(f)
+
+        self._compile()
+        self._index_graph()
+        if strict:
+            self.validate()
+
+        # Hot reload state (see watch / poll / apply_reload)
+        self._spans = None          # node id -> raw JSON text of the node
+        self._pending = None        # prepared version waiting to be swapped in
+        self._bad_stat = None       # file version that failed to load
+        self._reload_lock = threading.Lock()
+        self._watcher = None
+        self.reload_error = None
+        self.last_reload = None
+
+    # ------------------------
+    # Compilation
+    # ------------------------
+    # Node IDs are interned to ints (self.index / self.node_ids) and all
+    # choices are stored in flat arrays. The choices of node i live in
+    # slots choice_offsets[i] .. choice_offsets[i + 1] - 1.
+    def _compile(self):
+        self.node_ids = list(self.story)
+        self.index = {node_id: i for i, node_id in enumerate(self.node_ids)}
+
+        self.choice_offsets = array('i', [0])
+        self.choice_targets = array('i')      # -1 = dangling "next"
+        energies, reputations = [], []
+        self.choice_items = []
+        self.node_labels = []                 # choice labels per node, in slot order
+        self.dangling = []                    # (node, choice, missing target)
+
+        for node_id in self.node_ids:
+            choices = self.story[node_id].get("choices", {})
+            for label, data in choices.items():
+                target_idx, energy, reputation, items = self._choice_row(node_id, label, data)
+                self.choice_targets.append(target_idx)
+                energies.append(energy)
+                reputations.append(reputation)
+                self.choice_items.append(items)
+            self.node_labels.append(tuple(choices))
+            self.choice_offsets.append(len(self.choice_targets))
+        self.choice_energy = _stat_array(energies)
+        self.choice_reputation = _stat_array(reputations)
+
+        self._slots = [{label: k for k, label in enumerate(labels)} for labels in self.node_labels]
+
+    def _choice_row(self, node_id, label, data):
+        target = data.get("next")
+        target_idx = self.index.get(target, -1)
+        if target_idx < 0:
+            self.dangling.append((node_id, label, target))
+        effects = data.get("effects", {})
+        return (target_idx, effects.get("energy", 0), effects.get("reputation", 0),
+                tuple(effects.get("inventory", ())))
+
+    def _index_graph(self):
+        offsets = self.choice_offsets
+        self.terminal = frozenset(
+            i for i in range(len(self.node_ids)) if offsets[i] == offsets[i + 1])
+
+        # Breadth-first walk from the start node over valid links
+        reachable = set()
+        start = self.index.get(self.start)
+        queue = deque([] if start is None else [start])
+        while queue:
+            i = queue.popleft()
+            if i in reachable:
+                continue
+            reachable.add(i)
+            for c in range(offsets[i], offsets[i + 1]):
+                if self.choice_targets[c] >= 0:
+                    queue.append(self.choice_targets[c])
+        self.reachable = frozenset(reachable)
+
+    def validate(self):
+        errors = []
+        if self.start not in self.index:
+            errors.append(f"start node '{self.start}' does not exist")
+        for node_id, label, target in self.dangling:
+            errors.append(f"'{node_id}' -> '{label}' points to missing node '{target}'")
+        if errors:
+            raise ValueError(f"Broken story in {self.path}:\n  " + "\n  ".join(errors))
+
+    # ------------------------
+    # Lookups
+    # ------------------------
+    @property
+    def unreachable(self):
+        return [self.node_ids[i] for i in range(len(self.node_ids)) if i not in self.reachable]
+
+    def is_terminal(self, node_id):
+        return self.index[node_id] in self.terminal
+
+    def step(self, node_idx, choice_idx, state):
+        # Integer fast path: apply the k-th choice of a node, return the next node index
+        c = self.choice_offsets[node_idx] + choice_idx
+        target = self.choice_targets[c]
+        if target < 0:
+            raise KeyError(f"choice {choice_idx} of '{self.node_ids[node_idx]}' has no target node")
+        state.apply_delta(self.choice_energy[c], self.choice_reputation[c], self.choice_items[c])
+        return target
+
+    def make_choice(self, node_id, choice, state):
+        node_idx = self.index[node_id]
+        return self.node_ids[self.step(node_idx, self._slots[node_idx][choice], state)]
+
+    # ------------------------
+    # Hot reload
+    # ------------------------
+    # watch() polls the file on a daemon thread. When it changes, poll()
+    # splits it into per-node spans, parses only the spans that differ from
+    # the live version (the whole file if the split does not hold up),
+    # recompiles just those nodes (everything only when nodes or choice
+    # slots were added/removed) and validates the result, all on the
+    # watcher thread. The game calls apply_reload() between
+    # choices to swap the new version in at once. Edits that do not parse
+    # or validate are skipped (see reload_error); the live version stays.
+    _COMPILED = ("story", "node_ids", "index", "choice_offsets", "choice_targets",
+                 "choice_energy", "choice_reputation", "choice_items", "node_labels",
+                 "dangling", "_slots", "terminal", "reachable", "_spans", "_stat")
+
+    def watch(self, interval=1.0):
+        if self._watcher is not None:
+            return
+        stop = self._watcher = threading.Event()
+
+        def run():
+            self._baseline()
+            while not stop.wait(interval):
+                try:
+                    self.poll()
+                except OSError:
+                    pass    # file briefly missing while an editor saves it
+        threading.Thread(target=run, name="story-watch", daemon=True).start()
+
+    def stop_watching(self):
+        if self._watcher is not None:
+            self._watcher.set()
+            self._watcher = None
+
+    def _baseline(self):
+        # Raw spans of the live version, so the first edit is incremental too
+        if self._spans is None and _file_stat(self.path) == self._stat:
+            with open(self.path, encoding='utf-8') as f:
+                spans = _split_nodes(f.read())
+            if spans is not None and spans.keys() == self.story.keys():
+                self._spans = spans
+
+    def poll(self):
+        # Prepare a new version if the file changed; True if one is waiting
+        stat = _file_stat(self.path)
+        with self._reload_lock:
+            base = self._pending or self
+        if stat == base._stat or stat == self._bad_stat:
+            return base is not self
+
+        with open(self.path, encoding='utf-8') as f:
+            text = f.read()
+        try:
+            new = self._prepare(base, text, stat)
+        except ValueError as e:     # includes JSON syntax errors mid-edit
+            self.reload_error, self._bad_stat = str(e), stat
+            return base is not self
+        with self._reload_lock:
+            self._pending = new
+        self.reload_error = None
+        return True
+
+    def _prepare(self, base, text, stat):
+        spans = _split_nodes(text)
+        story = None
+        if spans is not None and base._spans is not None:
+            try:
+                story, changed = self._parse_spans(base, spans)
+            except ValueError:
+                story = None    # split in the wrong places; json.loads decides
+        if story is None:
+            story = json.loads(text)
+            if not isinstance(story, dict):
+                raise ValueError("story file must hold a JSON object of nodes")
+            changed = [k for k in story if story[k] != base.story.get(k)]
+            if spans is not None and spans.keys() != story.keys():
+                spans = None
+        removed = [k for k in base.story if k not in story]
+
+        new = StoryManager.__new__(StoryManager)
+        new.path, new.start, new.strict = self.path, self.start, self.strict
+        new.story, new._spans, new._stat = story, spans, stat
+        if not removed and len(story) == len(base.story) and all(
+                len(story[k].get("choices", {})) == base.choice_offsets[base.index[k] + 1]
+                - base.choice_offsets[base.index[k]] for k in changed):
+            new._patch(base, changed)
+        else:
+            new._compile()
+        new._index_graph()
+        if self.strict:
+            new.validate()
+        added = [k for k in story if k not in base.story]
+        new.last_reload = {"changed": [k for k in changed if k in base.story],
+                           "added": added, "removed": removed}
+        return new
+
+    @staticmethod
+    def _parse_spans(base, spans):
+        # (story, changed node ids), parsing only spans that differ from `base`
+        story, changed = {}, []
+        for node_id, raw in spans.items():
+            if base._spans.get(node_id) == raw:
+                story[node_id] = base.story[node_id]
+            else:
+                story[node_id] = json.loads(raw)
+                changed.append(node_id)
+        return story, changed
+
+    def _patch(self, base, changed):
+        # Same nodes and slot counts as `base`: copy its arrays and rewrite
+        # only the slots of the changed nodes
+        self.node_ids, self.index, self.choice_offsets = base.node_ids, base.index, base.choice_offsets
+        self.choice_targets = array('i', base.choice_targets)
+        self.choice_energy = array(base.choice_energy.typecode, base.choice_energy)
+        self.choice_reputation = array(base.choice_reputation.typecode, base.choice_reputation)
+        self.choice_items = list(base.choice_items)
+        self.node_labels = list(base.node_labels)
+        self._slots = list(base._slots)
+        changed_set = set(changed)
+        self.dangling = [d for d in base.dangling if d[0] not in changed_set]
+        for node_id in changed:
+            i = self.index[node_id]
+            choices = self.story[node_id].get("choices", {})
+            for c, (label, data) in enumerate(choices.items(), self.choice_offsets[i]):
+                target, energy, reputation, self.choice_items[c] = self._choice_row(node_id, label, data)
+                self.choice_targets[c] = target
+                self.choice_energy = _set_stat(self.choice_energy, c, energy)
+                self.choice_reputation = _set_stat(self.choice_reputation, c, reputation)
+            self.node_labels[i] = tuple(choices)
+            self._slots[i] = {label: k for k, label in enumerate(choices)}
+
+    def apply_reload(self, current=None):
+        # Swap in a prepared version (call between choices). Returns the node
+        # to continue from: `current`, or the start node if it was removed.
+        with self._reload_lock:
+            new, self._pending = self._pending, None
+        if new is None:
+            return current
+        self.__dict__.update({name: new.__dict__[name] for name in self._COMPILED})
+        self.last_reload = new.last_reload
+        if current is not None and current not in self.index:
+            self.last_reload["fallback"] = (current, self.start)
+            return self.start
+        return current
+
+    def reload(self, current=None):
+        # poll() + apply_reload() in one go, for callers without a watcher
+        self.poll()
+        return self.apply_reload(current)
+
+
+def _file_stat(path):
+    st = os.stat(path)
+    return st.st_mtime_ns, st.st_size
+
+
+def _split_nodes(text):
+    # {node id: raw JSON text} for a pretty-printed story (one top-level key
+    # per line at a fixed indent, as json.dump(indent=...) writes), else
+    # None. This is a guess: a line with exactly that indent and a quote is
+    # taken to start a top-level key, but a hand-edited file can put a
+    # nested key there too. A wrong split leaves some span that is not valid
+    # JSON on its own, so _prepare falls back to parsing the whole text.
+    m = re.match(r'\s*\{\r?\n([ \t]+)"', text)
+    end = text.rfind('}')
+    if m is None or text[end + 1:].strip():
+        return None
+    parts = text[m.end():end].split('\n' + m.group(1) + '"')
+    spans = {}
+    for part in parts:
+        try:
+            node_id, pos = scanstring(part, 0)
+        except ValueError:
+            return None
+        colon = part.find(':', pos)
+        if colon < 0 or part[pos:colon].strip():
+            return None
+        spans[node_id] = part[colon + 1:].strip().rstrip(',').rstrip()
+    return spans
@@ -0,0 +1,182 @@
+# engine/story_pack.py
+#
+# Indexed binary story format ("story pack") for very large stories.
+#
+#   python -m engine.story_pack data/story.json data/story.pack
+#
+# The pack is memory-mapped and a node is only decoded the first time it is
+# looked up, so startup cost does not depend on how many nodes the story has.
+#
+# Layout (little-endian):
+#   header      magic, version, start id length, node count,
+#               key table offset, node table offset
+#   start id    utf-8 bytes
+#   node table  (payload offset, payload length) per node
+#   key table   (id offset, id length, node index) per node, sorted by id
+#   blobs       node ids and compact JSON node payloads
+
+import json
+import mmap
+import struct
+import sys
+from collections import OrderedDict
+from collections.abc import Mapping
+
+from engine.profiling import timed
+
+MAGIC = b"STRY"
+VERSION = 1
+
+HEADER = struct.Struct("<4sHHIQQ")
+NODE_ENTRY = struct.Struct("<QI")
+KEY_ENTRY = struct.Struct("<QII")
+
+
+def is_story_pack(path):
+    with open(path, 'rb') as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+def convert(json_path, pack_path, start="start"):
+    # Validate links with the normal loader before writing anything
+    from engine.story_manager import StoryManager
+    story = StoryManager(json_path, start=start).story
+
+    node_ids = list(story)
+    ids = [node_id.encode('utf-8') for node_id in node_ids]
+    payloads = [json.dumps(story[node_id], separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+                for node_id in node_ids]
+    start_bytes = start.encode('utf-8')
+
+    node_table_at = HEADER.size + len(start_bytes)
+    key_table_at = node_table_at + NODE_ENTRY.size * len(node_ids)
+    blob_at = key_table_at + KEY_ENTRY.size * len(node_ids)
+
+    id_offsets, pos = [], blob_at
+    for b in ids:
+        id_offsets.append(pos)
+        pos += len(b)
+    payload_offsets = []
+    for b in payloads:
+        payload_offsets.append(pos)
+        pos += len(b)
+
+    with open(pack_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(start_bytes), len(node_ids),
+                            key_table_at, node_table_at))
+        f.write(start_bytes)
+        for offset, b in zip(payload_offsets, payloads):
+            f.write(NODE_ENTRY.pack(offset, len(b)))
+        for i in sorted(range(len(ids)), key=ids.__getitem__):
+            f.write(KEY_ENTRY.pack(id_offsets[i], len(ids[i]), i))
+        for b in ids:
+            f.write(b)
+        for b in payloads:
+            f.write(b)
+    return len(node_ids)
+
+
+class MappedStory(Mapping):
+    # Read-only dict-like view of a story pack: story[node_id] -> node dict
+    def __init__(self, path, cache_size=1024):
+        self.path = path
+        self.cache_size = cache_size
+        self._file = open(path, 'rb')
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, start_len, count, key_table_at, node_table_at = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a story pack")
+        if version != VERSION:
+            raise ValueError(f"{path} has story pack version {version}, expected {VERSION}")
+
+        self.start = bytes(self._mm[HEADER.size:HEADER.size + start_len]).decode('utf-8')
+        self._count = count
+        self._key_table_at = key_table_at
+        self._node_table_at = node_table_at
+        self._cache = OrderedDict()     # LRU of decoded nodes
+
+    def _key(self, k):
+        id_offset, id_len, index = KEY_ENTRY.unpack_from(self._mm, self._key_table_at + k * KEY_ENTRY.size)
+        return self._mm[id_offset:id_offset + id_len], index
+
+    def _find(self, node_id):
+        # Binary search over the sorted key table
+        target = node_id.encode('utf-8')
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            key, index = self._key(mid)
+            if key < target:
+                lo = mid + 1
+            elif key > target:
+                hi = mid
+            else:
+                return index
+        return -1
+
+    def __getitem__(self, node_id):
+        node = self._cache.get(node_id)
+        if node is not None:
+            self._cache.move_to_end(node_id)
+            return node
+
+        index = self._find(node_id) if isinstance(node_id, str) else -1
+        if index < 0:
+            raise KeyError(node_id)
+        offset, length = NODE_ENTRY.unpack_from(self._mm, self._node_table_at + index * NODE_ENTRY.size)
+        node = json.loads(self._mm[offset:offset + length])
+
+        self._cache[node_id] = node
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return node
+
+    def __contains__(self, node_id):
+        return node_id in self._cache or (isinstance(node_id, str) and self._find(node_id) >= 0)
+
+    def __len__(self):
+        return self._count
+
+    def __iter__(self):
+        # Sorted by id, not in authoring order
+        for k in range(self._count):
+            yield self._key(k)[0].decode('utf-8')
+
+    def close(self):
+        self._cache.clear()
+        self._mm.close()
+        self._file.close()
+
+
+class MappedStoryManager:
+    # StoryManager counterpart for story packs. Nodes are resolved by id on
+    # demand, so there is no compiled index of the whole graph.
+    @timed("story.load")
+    def __init__(self, path, start=None, cache_size=1024):
+        self.path = path
+        self.story = MappedStory(path, cache_size)
+        self.start = start or self.story.start
+
+    def is_terminal(self, node_id):
+        return not self.story[node_id].get("choices")
+
+    def make_choice(self, node_id, choice, state):
+        choice_data = self.story[node_id]["choices"][choice]
+        state.apply_effects(choice_data.get("effects", {}))
+        return choice_data["next"]
+
+    # Packs are rebuilt offline (python -m engine.story_pack), so there is
+    # nothing to hot reload; these keep the StoryManager interface.
+    def watch(self, interval=1.0):
+        pass
+
+    def apply_reload(self, current=None):
+        return current
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        sys.exit("usage: python -m engine.story_pack <story.json> <story.pack>")
+    n = convert(sys.argv[1], sys.argv[2])
+    print(f"Wrote {n} nodes to {sys.argv[2]}")
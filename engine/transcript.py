@@ -0,0 +1,49 @@
+# engine/transcript.py
+#
+# Story log with bounded memory: the last `max_entries` entries are kept in
+# a ring buffer for the UI, and every entry is streamed to a rotating
+# transcript file in batches of `batch` lines.
+
+import logging
+import os
+from collections import deque
+from logging.handlers import MemoryHandler, RotatingFileHandler
+
+TRANSCRIPT_PATH = os.path.join("logs", "transcript.log")
+
+
+class StoryLog:
+    def __init__(self, max_entries=200, path=TRANSCRIPT_PATH,
+                 max_bytes=1024 * 1024, backups=3, batch=20):
+        self.entries = deque(maxlen=max_entries)
+        self._handler = None
+        if path:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            target = RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backups,
+                                         encoding="utf-8")
+            target.setFormatter(logging.Formatter("%(message)s"))
+            # Buffers records and writes them to the file `batch` at a time
+            self._handler = MemoryHandler(batch, flushLevel=logging.CRITICAL + 1, target=target)
+
+    def append(self, text):
+        self.entries.append(text)
+        if self._handler is not None:
+            self._handler.handle(logging.makeLogRecord(
+                {"msg": text + "\n", "levelno": logging.INFO, "levelname": "INFO"}))
+
+    def flush(self):
+        if self._handler is not None:
+            self._handler.flush()
+
+    def close(self):
+        if self._handler is not None:
+            target = self._handler.target
+            self._handler.close()       # flushes the pending batch
+            target.close()
+            self._handler = None
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __iter__(self):
+        return iter(self.entries)
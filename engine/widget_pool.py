@@ -0,0 +1,47 @@
+# engine/widget_pool.py
+#
+# Reused choice buttons for the scene GUIs.
+#
+# Scenes used to destroy every button and build new ones (and rebind their
+# hover handlers) on each transition. A ButtonPool keeps the buttons it has
+# made: show() relabels the first len(options) of them, packs any that are
+# hidden, and pack_forget()s the rest. The widget count only grows to the
+# most choices any scene has had, and hover handlers are bound once per
+# button, so long sessions cost the same per scene as short ones.
+
+import tkinter as tk
+
+
+class ButtonPool:
+    def __init__(self, parent, pack=None, hover=None, **style):
+        self.parent = parent
+        self.style = style                  # applied on every show(), so hover colours reset
+        self.pack = pack or {}
+        self.hover = hover                  # background while the pointer is over a button
+        self.buttons = []
+        self.shown = 0
+
+    def _make(self):
+        btn = tk.Button(self.parent, **self.style)
+        if self.hover is not None:
+            btn.bind("<Enter>", lambda e: btn.config(bg=self.hover))
+            btn.bind("<Leave>", lambda e: btn.config(bg=self.style.get("bg")))
+        self.buttons.append(btn)
+        return btn
+
+    def show(self, options):
+        # options: [(label, command)], shown left to right in this order
+        options = list(options)
+        while len(self.buttons) < len(options):
+            self._make()
+        for i, (label, command) in enumerate(options):
+            btn = self.buttons[i]
+            btn.config(text=label, command=command, **self.style)
+            if i >= self.shown:
+                btn.pack(**self.pack)
+        for btn in self.buttons[len(options):self.shown]:
+            btn.pack_forget()
+        self.shown = len(options)
+
+    def clear(self):
+        self.show(())
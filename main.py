@@ -1,30 +1,28 @@
+import time
+_STARTED = time.perf_counter()   # before any other import, for --startup-time
+
 import tkinter as tk
 from tkinter import ttk, messagebox
-from PIL import Image, ImageTk, ImageEnhance
+from PIL import ImageTk
 import json
 import os
 import random
-import pickle
-import pygame
+import sys
 import tkinter.font as font
 
+from engine.asset_cache import load_resized, prefetch_resized
+from engine.audio import AudioManager
 from engine.factor_graph_ai import AIDecisionEngine
-from engine.game_state import GameState, save_game, load_game
-from engine.story_manager import StoryManager
-
-pygame.mixer.init()
-
+from engine.fade import FadeCache
+from engine.game_state import AUTOSAVE_PATH, SAVE_PATH, GameState, Journal, load_save, save_game
+from engine.graph_view import GraphView
+from engine import profiling
+from engine.profiling import timed
+from engine.story_manager import load_story
+from engine.transcript import StoryLog
+from engine.widget_pool import ButtonPool
 
-def play_music(filename):
-    pygame.mixer.music.load(filename)
-    pygame.mixer.music.play(-1)
-
-
-def play_click_sound():
-    click_path = os.path.join("assets", "sounds", "click.wav")
-    if os.path.exists(click_path):
-        click_sound = pygame.mixer.Sound(click_path)
-        click_sound.play()
+LOG_WINDOW_LINES = 120   # lines kept in the on-screen story log
 
 
 class AdventureGUI:
@@ -34,16 +32,30 @@ class AdventureGUI:
         self.master.geometry("800x700")
         self.master.configure(bg='black')
 
-        self.story = StoryManager().story
-        self.ai = AIDecisionEngine()
+        self.story_manager = load_story()
+        self.story_manager.watch()   # pick up edits to story.json between choices
+        self.story = self.story_manager.story
+        self.ai = AIDecisionEngine(model_path="data/factors.json",
+                                  policy_path="data/policy.npz")
         self.state = GameState()
+        self.seed = random.randrange(2 ** 32)   # stored in the journal for replay
+        self.rng = random.Random(self.seed)
         self.current_node = "start"
-        self.story_log = []
+        self.visited = set()      # node ids seen this game ("visited:<node>" AI evidence)
+        self.story_log = StoryLog()   # recent entries + transcript file
+        self.fade_cache = FadeCache()
+        self.audio = AudioManager(background=True)   # mixer opens off the UI thread
+        self.audio.preload_sound("click.wav")
+        self.journal = Journal()   # autosave.dat after every choice; Save writes save.dat
+        self.graph_view = None     # story graph window, built on first use
+        self.reload_error = None   # last story edit error shown in the log
 
         self.custom_font = font.Font(family="Georgia", size=14, weight="bold")
 
         self.create_widgets()
         self.show_intro()
+        # Decode the first scene while the player types their name
+        self.prefetch_scene(self.current_node)
 
     def create_widgets(self):
         self.canvas = tk.Canvas(self.master, width=800,
@@ -54,6 +66,16 @@ class AdventureGUI:
         self.text_bg = self.canvas.create_rectangle(
             20, 300, 780, 390, fill='#000000', stipple='gray25', outline='')
 
+        # Scene background: one image item, updated in place by the fade,
+        # over a black fill for scenes without an image
+        self.bg_fill = self.canvas.create_rectangle(
+            0, 0, 800, 400, fill='black', state='hidden')
+        self.bg_item = self.canvas.create_image(
+            0, 0, anchor='nw', state='hidden')
+        self.canvas.tag_lower(self.bg_item)
+        self.canvas.tag_lower(self.bg_fill)
+        self._fade_job = None
+
         self.story_text = tk.Label(self.master, text="", font=self.custom_font,
                                    fg='white', bg='#000000', wraplength=760, justify='left')
         self.story_text.pack(pady=(5, 0))
@@ -71,6 +93,10 @@ class AdventureGUI:
 
         self.choice_frame = tk.Frame(self.master, bg='black')
         self.choice_frame.pack(pady=10)
+        self.choice_buttons = ButtonPool(
+            self.choice_frame, pack={"side": "left", "padx": 10, "pady": 5}, hover='darkgreen',
+            font=('Georgia', 12), bg='gray15', fg='white',
+            activebackground='darkgreen', activeforeground='white')
 
         self.ai_label = tk.Label(self.master, text="",
                                  fg="cyan", font=("Arial", 12), bg='black')
@@ -88,10 +114,34 @@ class AdventureGUI:
         ttk.Button(self.ctrl_frame, text="📂 Load",
                    command=self.load_state).pack(side="left", padx=10)
         ttk.Button(self.ctrl_frame, text="🧠 Show AI Graph",
-                   command=self.ai.show_graph).pack(side="left", padx=10)
+                   command=self.show_graph).pack(side="left", padx=10)
+
+    def show_graph(self):
+        # Rendered on a worker thread; the window fills in when it is ready
+        if self.graph_view is None:
+            self.graph_view = GraphView(self.story_manager, self.ai.model)
+        win = tk.Toplevel(self.master, bg='black')
+        win.title("Story Graph")
+        label = tk.Label(win, text="Drawing story graph...", fg='white', bg='black',
+                         font=self.custom_font)
+        label.pack(padx=10, pady=10)
+        future = self.graph_view.render_async((900, 600), self.current_node)
+        self._poll_graph(win, label, future)
+
+    def _poll_graph(self, win, label, future):
+        if not win.winfo_exists():
+            return
+        if not future.done():
+            self.master.after(50, self._poll_graph, win, label, future)
+            return
+        try:
+            label.image = ImageTk.PhotoImage(future.result())
+            label.config(image=label.image, text="")
+        except Exception as e:
+            label.config(text=f"Could not draw the story graph: {e}")
 
     def show_intro(self):
-        self.canvas.delete("all")
+        self.canvas.itemconfig(self.text_bg, state='hidden')
         self.story_text.config(
             text="Welcome to Adventure Quest!\nEnter your name to begin:")
         self.name_entry = tk.Entry(self.master, font=('Georgia', 14))
@@ -101,113 +151,188 @@ class AdventureGUI:
         self.start_btn.pack(pady=10)
 
     def start_game(self):
-        play_click_sound()
+        self.audio.play_sound("click.wav")
         self.state.name = self.name_entry.get() or "Player"
         self.name_entry.destroy()
         self.start_btn.destroy()
+        self.journal.begin(self.state, self.current_node, seed=self.seed)
         self.display_node()
 
+    @timed("gui.display_node")
     def display_node(self):
         node = self.story[self.current_node]
+        self.visited.add(self.current_node)
 
-        # Play background music
-        music_path = os.path.join(
-            "assets", "sounds", f"{self.current_node}.mp3")
+        # Play background music (no-op if this track is already playing)
+        music_path = self.music_path(self.current_node)
         if os.path.exists(music_path):
-            play_music(music_path)
+            self.audio.play_music(music_path)
 
         # Background image with fade effect
         img_path = os.path.join("assets", node.get("image", "default.png"))
         if os.path.exists(img_path):
             self.fade_in_background(img_path)
         else:
-            self.canvas.delete("all")
-            self.canvas.create_rectangle(0, 0, 800, 400, fill='black')
+            self.stop_fade()
+            self.canvas.itemconfig(self.bg_item, state='hidden')
+            self.canvas.itemconfig(self.bg_fill, state='normal')
 
         self.story_text.config(text=node["text"])
         self.append_to_log(node["text"])
 
-        for widget in self.choice_frame.winfo_children():
-            widget.destroy()
-
         choices = node.get("choices", {})
         if not choices:
+            self.choice_buttons.clear()
             messagebox.showinfo("Game Over", "Thanks for playing!")
+            self.journal.close()
+            self.story_log.close()
             self.master.quit()
             return
 
-        ai_choice = self.ai.suggest(
-            self.state.energy, self.state.reputation, choices)
+        ai_choice = self.ai.suggest_for(
+            self.state, self.current_node, choices, self.visited, rng=self.rng)
         self.ai_label.config(text=f"🤖 AI Suggests: {ai_choice}")
 
-        for choice_text, choice_data in choices.items():
-            btn = tk.Button(self.choice_frame, text=choice_text, font=('Georgia', 12),
-                            bg='gray15', fg='white', activebackground='darkgreen', activeforeground='white',
-                            command=lambda c=choice_text: self.make_choice(c))
-            btn.pack(side="left", padx=10, pady=5)
-            btn.bind("<Enter>", lambda e, b=btn: b.config(bg='darkgreen'))
-            btn.bind("<Leave>", lambda e, b=btn: b.config(bg='gray15'))
+        self.choice_buttons.show(
+            (choice_text, lambda c=choice_text: self.make_choice(c)) for choice_text in choices)
+        for choice_data in choices.values():
+            # Warm the image and music caches for every scene reachable from here
+            self.prefetch_scene(choice_data.get("next"))
 
         self.update_stats()
 
+    def music_path(self, node_id):
+        return os.path.join("assets", "sounds", f"{node_id}.mp3")
+
+    def prefetch_scene(self, node_id):
+        node = self.story.get(node_id)
+        if node is not None:
+            prefetch_resized(os.path.join("assets", node.get("image", "default.png")),
+                             (800, 400), "RGBA")
+            self.audio.preload_music(self.music_path(node_id))
+
     def fade_in_background(self, img_path):
-        self.canvas.delete("all")
+        self.stop_fade()
+        self.canvas.itemconfig(self.bg_fill, state='hidden')
         # FIX: convert image mode to RGBA before brightness enhancement
-        self.bg_img_pil = Image.open(img_path).convert(
-            "RGBA").resize((800, 400))
-        self.alpha = 0
+        # (decoded + resized copies come from the asset cache)
+        self.bg_img_pil = load_resized(img_path, (800, 400), "RGBA")
+        # All brightness frames are precomputed once per image
+        self.fade_frames = self.fade_cache.get(
+            img_path, self.bg_img_pil, ImageTk.PhotoImage)
+        self.fade_index = 0
         self.bg_img_tk = None
         self._fade_step()
 
+    @timed("gui.fade_step")
     def _fade_step(self):
-        if self.alpha < 1.0:
-            enhancer = ImageEnhance.Brightness(self.bg_img_pil)
-            img = enhancer.enhance(self.alpha)
-            self.bg_img_tk = ImageTk.PhotoImage(img)
-            self.canvas.create_image(0, 0, anchor='nw', image=self.bg_img_tk)
-            self.alpha += 0.05
-            self.master.after(50, self._fade_step)
-        else:
-            self.bg_img_tk = ImageTk.PhotoImage(self.bg_img_pil)
-            self.canvas.create_image(0, 0, anchor='nw', image=self.bg_img_tk)
+        self.bg_img_tk = self.fade_frames[self.fade_index]
+        self.canvas.itemconfig(self.bg_item, image=self.bg_img_tk, state='normal')
+        self.fade_index += 1
+        self._fade_job = None
+        if self.fade_index < len(self.fade_frames):
+            self._fade_job = self.master.after(50, self._fade_step)
+
+    def stop_fade(self):
+        # A scene change mid-fade must not leave the old fade running
+        if self._fade_job is not None:
+            self.master.after_cancel(self._fade_job)
+            self._fade_job = None
 
     def append_to_log(self, text):
         self.story_log.append(text)
         self.log_text.config(state='normal')
         self.log_text.insert('end', text + "\n\n")
+        # Keep only the last LOG_WINDOW_LINES lines in the widget
+        lines = int(self.log_text.index('end-1c').split('.')[0])
+        if lines > LOG_WINDOW_LINES:
+            self.log_text.delete('1.0', f'{lines - LOG_WINDOW_LINES + 1}.0')
         self.log_text.config(state='disabled')
         self.log_text.see('end')
 
     def make_choice(self, choice):
-        play_click_sound()
-        node = self.story[self.current_node]
-        choice_data = node["choices"][choice]
-
-        effects = choice_data.get("effects", {})
-        self.state.apply_effects(effects)
-
-        self.current_node = choice_data["next"]
+        self.audio.play_sound("click.wav")
+        prev_node = self.current_node
+        effects = self.story[prev_node]["choices"][choice].get("effects", {})
+        self.current_node = self.story_manager.make_choice(
+            prev_node, choice, self.state)
+        self.apply_story_edits()
+        self.journal.record(prev_node, choice, effects, self.current_node)
         self.display_node()
 
+    def apply_story_edits(self):
+        # Swap in a reloaded story.json between choices; state is kept.
+        # An edit that fails to load is reported once and the story goes on.
+        error = self.story_manager.reload_error
+        if error and error != self.reload_error:
+            self.append_to_log(f"(story.json edit not loaded: {error})")
+        self.reload_error = error
+        node = self.story_manager.apply_reload(self.current_node)
+        if self.story_manager.story is self.story:
+            return
+        self.story = self.story_manager.story
+        self.graph_view = None
+        if node != self.current_node:
+            self.append_to_log(f"(The story was edited and '{self.current_node}' is gone; "
+                               f"continuing from '{node}'.)")
+            self.current_node = node
+
     def update_stats(self):
         inv = ', '.join(
             self.state.inventory) if self.state.inventory else 'Empty'
         self.stats.config(
             text=f"🧍 {self.state.name} | ❤️ {self.state.energy} | ⭐ {self.state.reputation} | 🎒 {inv}")
 
+    @timed("gui.save")
     def save_state(self):
-        save_game(self.state, self.current_node)
+        try:
+            save_game(self.state, self.current_node, SAVE_PATH, seed=self.seed)
+        except OSError as e:
+            messagebox.showerror("Save failed", f"The game could not be saved:\n{e}")
+            return
         messagebox.showinfo("Saved", "Game saved successfully!")
 
+    @timed("gui.load")
     def load_state(self):
+        # The player's save; the autosave only if they never saved
+        path = SAVE_PATH if os.path.exists(SAVE_PATH) else AUTOSAVE_PATH
+        if path == AUTOSAVE_PATH:
+            try:
+                self.journal.flush()
+            except Exception as e:
+                messagebox.showerror("Save failed", f"Autosave failed:\n{e}")
         try:
-            self.state, self.current_node = load_game()
+            self.state, self.current_node, seed = load_save(path)
+            self.visited = set()    # saves keep no history before the current node
+            # AI tie-breaks restart from the loaded game's seed, not this window's
+            if seed is not None:
+                self.seed = seed
+            self.rng = random.Random(self.seed)
+            self.journal.begin(self.state, self.current_node, seed=self.seed)
             self.display_node()
         except:
             messagebox.showerror("Error", "No saved file found.")
 
 
+def report_startup(root, imported, built):
+    # python main.py --startup-time: time to the first interactive frame, then exit
+    root.update()
+    drawn = time.perf_counter()
+    phases = [("imports", imported - _STARTED), ("window", built - imported),
+              ("first frame", drawn - built), ("total", drawn - _STARTED)]
+    for name, seconds in phases:
+        profiling.record(f"startup.{name}", seconds)
+        print(f"{name:<12} {1000 * seconds:8.1f} ms")
+    root.destroy()
+
+
 if __name__ == "__main__":
+    imported = time.perf_counter()
     root = tk.Tk()
     app = AdventureGUI(root)
-    root.mainloop()
+    if "--startup-time" in sys.argv:
+        report_startup(root, imported, time.perf_counter())
+    else:
+        root.mainloop()
+    if profiling.enabled():
+        profiling.export(os.environ.get("ADVENTURE_PROFILE_OUT", "logs/profile.json"))
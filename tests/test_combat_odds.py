@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+
+import FinalGame.combat_odds as combat
+from FinalGame.combat_odds import ATTACK_PMF, TAKEN_PMF, combat_odds
+
+
+def brute_force(player_hp, enemy_hp, p):
+    # Turn-by-turn DP over (player HP, enemy HP); a defend that deals no
+    # damage leaves the state unchanged, so it is solved out of the equation
+    stay = (1.0 - p) * TAKEN_PMF[0]
+    table = {}
+    for h in range(1, player_hp + 1):
+        for e in range(1, enemy_hp + 1):
+            out = np.zeros(player_hp + 1)
+            for d, prob in enumerate(p * ATTACK_PMF):
+                if d >= e:
+                    out[h] += prob                  # enemy down, HP h left
+                elif prob:
+                    out += prob * table[h, e - d]
+            for d, prob in enumerate((1.0 - p) * TAKEN_PMF):
+                if d >= h:
+                    out[0] += prob                  # player down
+                elif d and prob:
+                    out += prob * table[h - d, e]
+            table[h, e] = out / (1.0 - stay)
+    return table[player_hp, enemy_hp]
+
+
+@pytest.fixture
+def fresh_cache():
+    combat_odds.cache_clear()
+    yield
+    combat_odds.cache_clear()
+
+
+@pytest.mark.parametrize("p", [1.0, 0.5, 0.0])
+def test_odds_match_brute_force(fresh_cache, p):
+    for player_hp, enemy_hp in [(60, 50), (13, 37), (1, 1)]:
+        expected = brute_force(player_hp, enemy_hp, p)
+        assert combat_odds(player_hp, enemy_hp, p).hp == pytest.approx(expected, abs=1e-9)
+
+
+def test_fft_products_match_direct(fresh_cache, monkeypatch):
+    direct = combat_odds(100, 50, 0.5).hp.copy()
+    combat_odds.cache_clear()
+    monkeypatch.setattr(combat, "FFT_ABOVE", 4)
+    assert combat_odds(100, 50, 0.5).hp == pytest.approx(direct, abs=1e-9)
@@ -0,0 +1,38 @@
+import random
+
+from FinalGame.factor_core import Factor, FactorGame, FactorScheduler, Variable
+
+ACTIONS = ["GoCave", "GoRiver", "GoTreasure", "ReturnForest", "Fight", "Attack", "Defend"]
+
+
+class FullSweepGame(FactorGame):
+    # The update before the scheduler: every rule runs on every action
+    def take_action(self, action):
+        self.history.append(action)
+        for f in self.factors:
+            f.update(action)
+        if self.PlayerHP.value <= 0:
+            self.Inventory.value = ["⚔️ Broken Sword", "🪨 Rocks", "🛡️ Torn Shield"]
+
+
+def test_scheduled_runs_match_full_sweep():
+    for seed in range(200):
+        pick = random.Random(seed)
+        game, reference = FactorGame(seed), FullSweepGame(seed)
+        for _ in range(60):
+            action = pick.choice(ACTIONS)
+            game.take_action(action)
+            reference.take_action(action)
+            assert game.snapshot() == reference.snapshot(), (seed, game.history)
+
+
+def test_changes_outside_dispatch_do_not_fire_watchers():
+    fired = []
+    watched, other = Variable("watched", 0), Variable("other", 0)
+    scheduler = FactorScheduler()
+    scheduler.add(Factor("Watcher", lambda vars, action: fired.append(action), [other], watches=[watched]))
+    scheduler.add(Factor("Step", lambda vars, action: None, [], actions=["step"]))
+
+    watched.value = 1
+    scheduler.dispatch("step")
+    assert fired == []
@@ -0,0 +1,26 @@
+import itertools
+
+import numpy as np
+
+from engine.factor_model import DiscreteModel
+
+
+def model():
+    rng = np.random.default_rng(0)
+    variables = {"energy": [0, 1, 2], "has_gem": [False, True], "action": ["rest", "sneak", "fight"]}
+    factors = [(("energy", "action"), rng.random(9)), (("has_gem", "action"), rng.random(6))]
+    return DiscreteModel(variables, factors)
+
+
+def test_map_memo_matches_inference_and_follows_factor_edits():
+    m = model()
+    cases = [{"energy": e, "has_gem": g} for e, g in itertools.product([0, 1, 2], [False, True])]
+    for evidence in cases * 2:
+        posterior = m.query(["action"], evidence)
+        assert m.map_query(["action"], evidence)["action"] == m.variables["action"][posterior.argmax()]
+
+    m.map_query(["action"], cases[0])["action"] = "changed"     # callers get a copy
+    assert m.map_query(["action"], cases[0])["action"] != "changed"
+
+    m.set_factor(("action", "energy"), np.eye(3)[[2, 0, 1]])   # action[e] forced by energy
+    assert [m.map_query(["action"], {"energy": e, "has_gem": False})["action"] for e in range(3)] == ["sneak", "fight", "rest"]
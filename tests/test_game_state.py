@@ -0,0 +1,93 @@
+import os
+import shutil
+
+import pytest
+
+from engine.game_state import GameState, Journal, journal_path, load_game, load_save, save_game
+
+
+def play(journal, name, moves):
+    state = GameState()
+    state.name = name
+    journal.begin(state, "start")
+    node = "start"
+    for i, effects in enumerate(moves):
+        journal.record(node, f"choice{i}", effects, f"n{i}")
+        state.apply_effects(effects)
+        node = f"n{i}"
+    journal.flush()
+    return state, node
+
+
+def test_new_game_ignores_previous_games_journal(tmp_path):
+    # Crash after begin() wrote the new checkpoint but before it truncated
+    # the journal: the old game's records (seq 1..N) must not be replayed.
+    path = str(tmp_path / "save.dat")
+    journal = Journal(path, checkpoint_every=100)
+    play(journal, "A", [{"energy": -1, "inventory": ["gem"]}] * 5)
+    shutil.copy(journal_path(path), str(tmp_path / "old.journal"))
+
+    play(journal, "B", [])
+    journal.close()
+    shutil.copy(str(tmp_path / "old.journal"), journal_path(path))
+
+    state, node = load_game(path)
+    assert (state.name, state.energy, state.inventory, node) == ("B", 3, [], "start")
+
+
+def test_load_replays_journal_after_checkpoint(tmp_path):
+    path = str(tmp_path / "save.dat")
+    journal = Journal(path, checkpoint_every=3)
+    expected, node = play(journal, "A", [{"energy": -1}, {"reputation": 2}, {"inventory": ["key"]},
+                                         {"energy": 1}, {"reputation": -1}])
+    journal.close()
+    state, loaded = load_game(path)
+    assert (state.to_dict(), loaded) == (expected.to_dict(), node)
+
+
+def test_flush_raises_write_errors_instead_of_hanging(tmp_path):
+    path = str(tmp_path / "missing" / "save.dat")
+    journal = Journal(path)
+    journal.begin(GameState(), "start")
+    journal.record("start", "left", {"energy": -1}, "cave")
+    with pytest.raises(OSError):
+        journal.flush()
+
+    # The writer is still alive and recovers once the directory exists
+    os.makedirs(os.path.dirname(path))
+    journal.record("cave", "right", {"reputation": 1}, "river")
+    journal.flush()
+    journal.close()
+    state, node = load_game(path)
+    assert (state.energy, state.reputation, node) == (2, 1, "river")
+
+
+def test_autosave_never_overwrites_the_players_save(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    saved = GameState()
+    saved.name = "Saved"
+    save_game(saved, "cave", seed=7)
+
+    journal = Journal()
+    play(journal, "New", [{"energy": -1}])
+    journal.close()
+
+    state, node, seed = load_save()
+    assert (state.name, node, seed) == ("Saved", "cave", 7)
+    assert load_game("autosave.dat")[0].name == "New"
+
+
+def test_inventory_supports_in_place_changes():
+    state = GameState()
+    state.inventory.append("key")
+    state.inventory += ["gem", "key"]
+    assert state.inventory == ["key", "gem", "key"]
+    assert state.has("gem") and state.count("key") == 2
+
+    twin = state.clone()
+    state.inventory.remove("gem")
+    assert not state.has("gem") and twin.inventory == ["key", "gem", "key"]
+
+    items = state.inventory
+    del items[:]
+    assert (state.inventory, state.has("key")) == ([], False)
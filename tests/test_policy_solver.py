@@ -0,0 +1,60 @@
+import json
+import warnings
+
+import numpy as np
+
+import engine.policy_solver as policy_solver
+from engine.policy_solver import PolicySolver
+from engine.story_manager import StoryManager
+
+# start -> cave -> start is a cycle; "wait" loops on start. Fighting in the
+# cave is worth +2 reputation and swimming the river +1, so the best policy
+# is left, fight -- except where reputation is clamped and both tie at the
+# cap, where the choice found first (right, in one step) is kept. The pit
+# never reaches an ending, so it stays at -inf with no choice.
+STORY = {
+    "start": {"text": "", "choices": {
+        "wait": {"next": "start", "effects": {"energy": -1}},
+        "left": {"next": "cave"},
+        "right": {"next": "river"}}},
+    "cave": {"text": "", "choices": {
+        "back": {"next": "start"},
+        "fight": {"next": "won", "effects": {"reputation": 2, "energy": -2}}}},
+    "pit": {"text": "", "choices": {"fall": {"next": "pit"}}},
+    "river": {"text": "", "choices": {"swim": {"next": "shore", "effects": {"reputation": 1}}}},
+    "won": {"text": "", "choices": {}},
+    "shore": {"text": "", "choices": {}},
+}
+
+
+def solve(tmp_path):
+    path = tmp_path / "story.json"
+    path.write_text(json.dumps(STORY))
+    solver = PolicySolver(StoryManager(str(path)))
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        policy = solver.solve()
+    assert solver.converged
+    return policy
+
+
+def test_cyclic_story_matches_hand_computed_policy(tmp_path):
+    policy = solve(tmp_path)
+    r0, r1 = policy.reputation_range
+    for energy in range(policy.energy_range[0], policy.energy_range[1] + 1):
+        for reputation in range(r0, r1 + 1):
+            expected = "left" if reputation + 2 <= r1 else "right"
+            assert policy.best_choice("start", energy, reputation) == expected
+            assert policy.best_choice("cave", energy, reputation) == "fight"
+            assert policy.expected_value("start", energy, reputation) == min(reputation + 2, r1)
+    assert policy.best_choice("won", 3, 0) is None
+    assert policy.best_choice("pit", 3, 0) is None
+    assert policy.expected_value("pit", 3, 0) == -np.inf
+
+
+def test_chunked_backup_matches_single_batch(tmp_path, monkeypatch):
+    expected = solve(tmp_path)
+    monkeypatch.setattr(policy_solver, "CHUNK_ELEMENTS", 1)
+    chunked = solve(tmp_path)
+    assert np.array_equal(chunked.choice, expected.choice)
+    assert np.array_equal(chunked.value, expected.value)
@@ -0,0 +1,119 @@
+import copy
+import json
+import os
+
+import pytest
+
+from engine.game_state import GameState
+from engine.policy_solver import PolicySolver
+from engine.story_manager import StoryManager
+
+
+def write_story(path, story):
+    with open(path, 'w') as f:
+        json.dump(story, f, indent=2)
+    return str(path)
+
+
+STORY = {
+    "start": {"text": "A fork.", "choices": {
+        "left": {"next": "cave", "effects": {"energy": -1}},
+        "right": {"next": "river", "effects": {"reputation": 1, "inventory": ["map"]}}}},
+    "cave": {"text": "Dark.", "choices": {"back": {"next": "start"}}},
+    "river": {"text": "The end.", "choices": {}},
+}
+
+
+def test_fractional_effects_load_and_apply(tmp_path):
+    story = json.loads(json.dumps(STORY))
+    story["start"]["choices"]["left"]["effects"]["energy"] = -0.5
+    manager = StoryManager(write_story(tmp_path / "story.json", story))
+    state = GameState()
+    assert manager.make_choice("start", "left", state) == "cave"
+    assert state.energy == 2.5
+
+    # Integer stories keep integer stats
+    state = GameState()
+    StoryManager(write_story(tmp_path / "int.json", STORY)).make_choice("start", "left", state)
+    assert state.energy == 2 and isinstance(state.energy, int)
+
+    with pytest.raises(ValueError, match="fractional energy"):
+        PolicySolver(manager)
+
+
+# ------------------------
+# Hot reload
+# ------------------------
+def edit(path, text):
+    # Rewrite the story so poll() sees a new (mtime, size) even within one tick
+    before = os.stat(path).st_mtime_ns
+    with open(path, 'w') as f:
+        f.write(text)
+    os.utime(path, ns=(before + 10 ** 9, before + 10 ** 9))
+
+
+def watched(tmp_path):
+    path = write_story(tmp_path / "story.json", STORY)
+    manager = StoryManager(path)
+    manager._baseline()         # what watch() does first, so reloads are incremental
+    return path, manager
+
+
+def edited(change):
+    story = copy.deepcopy(STORY)
+    change(story)
+    return json.dumps(story, indent=2)
+
+
+def test_reload_node_edit(tmp_path):
+    path, manager = watched(tmp_path)
+    edit(path, edited(lambda s: s["cave"].update(text="Pitch dark.")))
+    assert manager.reload("cave") == "cave"
+    assert manager.story["cave"]["text"] == "Pitch dark."
+    assert manager.last_reload["changed"] == ["cave"]
+
+
+def test_reload_added_node(tmp_path):
+    path, manager = watched(tmp_path)
+
+    def add_lake(story):
+        story["lake"] = {"text": "Still water.", "choices": {}}
+        story["river"]["choices"]["wade"] = {"next": "lake"}
+    edit(path, edited(add_lake))
+    assert manager.reload("river") == "river"
+    assert manager.last_reload["added"] == ["lake"]
+    assert manager.make_choice("river", "wade", GameState()) == "lake"
+
+
+def test_reload_deleted_current_node(tmp_path):
+    path, manager = watched(tmp_path)
+
+    def drop_cave(story):
+        del story["cave"]
+        story["start"]["choices"]["left"]["next"] = "river"
+    edit(path, edited(drop_cave))
+    assert manager.reload("cave") == "start"
+    assert manager.last_reload["removed"] == ["cave"]
+    assert manager.make_choice("start", "left", GameState()) == "river"
+
+
+def test_reload_rejects_broken_edit(tmp_path):
+    path, manager = watched(tmp_path)
+    edit(path, edited(lambda s: s["cave"].update(text="Half")).replace('"Half"', '"Half'))
+    assert manager.reload("cave") == "cave"
+    assert manager.reload_error and manager.story == STORY
+
+    edit(path, edited(lambda s: s["cave"].update(text="Whole")))
+    assert manager.reload("cave") == "cave"
+    assert manager.reload_error is None and manager.story["cave"]["text"] == "Whole"
+
+
+def test_reload_nested_key_at_top_level_indent(tmp_path):
+    # Hand-edited indentation: a key of "cave" sits where node ids do
+    path, manager = watched(tmp_path)
+    text = edited(lambda s: s["cave"].update(text="Echoes.")).replace('\n    "text": "Echoes."',
+                                                                     '\n  "text": "Echoes."')
+    edit(path, text)
+    assert manager.reload("cave") == "cave"
+    assert manager.reload_error is None
+    assert manager.story == json.loads(text)